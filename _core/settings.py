@@ -256,6 +256,18 @@ SPECTACULAR_SETTINGS = {
     'REDOC_DIST': 'SIDECAR',
 }
 
+# Plan calculation cache (in-process, per worker)
+PLAN_CACHE_MAX_ENTRIES = 256
+PLAN_CACHE_TIMEOUT = 300  # seconds
+
+# Queue plan calculations for the run_plan_worker command instead of running
+# them inside the request
+PLAN_CALCULATION_ASYNC = False
+
+# Time each phase of plan calculations, logging the results and returning
+# them in a Server-Timing header
+PLAN_TIMING = False
+
 # Security settings for production
 if not DEBUG:
     SECURE_SSL_REDIRECT = True
@@ -24,6 +24,19 @@ class IsPremiumUser(BasePermission):
         return active_subscription.plan.tier != 'free'
 
 
+def remaining_loan_slots(user):
+    """Return how many more active loans the user's subscription allows."""
+    # Get user's active subscription
+    subscription = UserSubscription.objects.filter(
+        user=user,
+        status='active'
+    ).first()
+
+    # Free tier allows 3 loans; premium tiers use the plan limit
+    max_loans = subscription.plan.max_loans if subscription else 3
+    return max_loans - user.loans.filter(is_active=True).count()
+
+
 class HasLoanLimit(BasePermission):
     """
     Permission that checks if user hasn't exceeded their loan limit.
@@ -33,20 +46,7 @@ class HasLoanLimit(BasePermission):
         if not request.user.is_authenticated:
             return False
 
-        # Get user's active subscription
-        subscription = UserSubscription.objects.filter(
-            user=request.user,
-            status='active'
-        ).first()
-
-        if not subscription:
-            # Free tier - check loan count
-            loan_count = request.user.loans.filter(is_active=True).count()
-            return loan_count < 3  # Free tier limit
-
-        # Premium tier - check against plan limits
-        loan_count = request.user.loans.filter(is_active=True).count()
-        return loan_count < subscription.plan.max_loans
+        return remaining_loan_slots(request.user) > 0
 
 
 class HasPlanLimit(BasePermission):
@@ -115,4 +115,4 @@ class CanComparePlans(BasePermission):
             return False  # Free users cannot compare plans
 
         # Check if plan allows comparison (Pro and Premium)
-        return subscription.plan.tier in ['pro', 'premium']
\ No newline at end of file
+        return subscription.plan.can_compare
\ No newline at end of file
@@ -1,9 +1,40 @@
 from django.db import models
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
+from django.db.models.functions import Cast, Ceil, Ln
+from django.db.models.lookups import LessThanOrEqual
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+import math
 import uuid
 
 
+class LoanQuerySet(models.QuerySet):
+    """Queryset for loans, with minimum-payment payoff estimates computed in the database."""
+
+    def with_payoff_estimates(self):
+        """Annotate each loan with ``payoff_months_estimate`` and ``interest_paid_estimate``.
+
+        These are the values of ``estimated_payoff_months`` and
+        ``total_interest_paid``, worked out by the database so listings need
+        no per-loan Python math. Loans whose minimum payment does not cover
+        the interest are annotated with NULL.
+        """
+        balance = Cast('balance', FloatField())
+        payment = Cast('minimum_payment', FloatField())
+        rate = Cast('interest_rate', FloatField()) / Value(1200.0)
+
+        months = Case(
+            When(minimum_payment__lte=0, then=None),
+            When(interest_rate=0, then=Ceil(balance / payment)),
+            When(LessThanOrEqual(payment, balance * rate), then=None),
+            default=Ceil(-Ln(Value(1.0) - balance * rate / payment) / Ln(Value(1.0) + rate)),
+            output_field=FloatField()
+        )
+        return self.annotate(payoff_months_estimate=Cast(months, IntegerField())).annotate(
+            interest_paid_estimate=Cast(F('payoff_months_estimate'), FloatField()) * payment - balance
+        )
+
+
 class Loan(models.Model):
     """Model representing a user's debt/loan."""
 
@@ -17,6 +48,9 @@ class Loan(models.Model):
         ('other', 'Other'),
     ]
 
+    # Loan types whose rate usually tracks a market index rather than staying fixed
+    VARIABLE_RATE_TYPES = ('credit_card', 'personal_loan')
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='loans')
     name = models.CharField(max_length=100, help_text="Name or description of the loan")
@@ -73,6 +107,8 @@ class Loan(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = LoanQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Loan'
@@ -86,31 +122,40 @@ class Loan(models.Model):
         """Calculate monthly interest rate from annual rate."""
         return self.interest_rate / 100 / 12
 
+    @property
+    def has_variable_rate(self):
+        """Whether this loan's rate is expected to move with market rates."""
+        return self.loan_type in self.VARIABLE_RATE_TYPES
+
     @property
     def estimated_payoff_months(self):
-        """Estimate months to pay off with minimum payments (simplified calculation)."""
-        if self.minimum_payment <= 0:
-            return None
+        """Estimate months to pay off with minimum payments, or None if they never will.
+
+        Loans fetched with ``Loan.objects.with_payoff_estimates()`` carry the
+        value from the database; otherwise it is calculated here the same way.
+        """
+        if hasattr(self, 'payoff_months_estimate'):
+            return self.payoff_months_estimate
 
-        # Simplified calculation - doesn't account for compound interest properly
-        # For accurate calculations, use the debt plan algorithms
         balance = float(self.balance)
-        monthly_rate = float(self.monthly_interest_rate)
         min_payment = float(self.minimum_payment)
-
+        monthly_rate = float(self.interest_rate) / 1200
+        if min_payment <= 0:
+            return None
         if monthly_rate == 0:
-            return balance / min_payment
-
-        # Approximate using formula for loan amortization
-        try:
-            months = - (balance * monthly_rate) / (min_payment * (1 - (1 + monthly_rate) ** (-balance / min_payment)))
-            return max(1, round(months))
-        except (ZeroDivisionError, ValueError):
+            return math.ceil(balance / min_payment)
+        if min_payment <= balance * monthly_rate:
             return None
 
+        # Number of payments of an annuity that amortizes the balance
+        return math.ceil(-math.log(1 - balance * monthly_rate / min_payment) / math.log(1 + monthly_rate))
+
     @property
     def total_interest_paid(self):
         """Calculate total interest that would be paid with minimum payments."""
+        if hasattr(self, 'interest_paid_estimate'):
+            return self.interest_paid_estimate
+
         months = self.estimated_payoff_months
         if months is None:
             return None
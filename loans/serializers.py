@@ -7,15 +7,19 @@ class LoanSerializer(serializers.ModelSerializer):
 
     monthly_interest_rate = serializers.ReadOnlyField()
     estimated_payoff_months = serializers.ReadOnlyField()
+    total_interest_paid = serializers.ReadOnlyField()
 
     class Meta:
         model = Loan
         fields = [
             'id', 'user', 'name', 'balance', 'interest_rate', 'monthly_interest_rate',
-            'minimum_payment', 'estimated_payoff_months', 'original_balance', 'remaining_term_months',
-            'due_date', 'is_active', 'created_at', 'updated_at'
+            'minimum_payment', 'estimated_payoff_months', 'total_interest_paid', 'original_balance',
+            'remaining_term_months', 'due_date', 'is_active', 'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'id', 'user', 'monthly_interest_rate', 'estimated_payoff_months', 'total_interest_paid',
+            'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'user', 'monthly_interest_rate', 'estimated_payoff_months', 'created_at', 'updated_at']
 
     def create(self, validated_data):
         """Create a loan for the authenticated user."""
@@ -58,6 +58,34 @@ class LoanModelTest(TestCase):
         # With $500 payment on $10,000 balance, should take 20 months
         self.assertEqual(loan.estimated_payoff_months, 20)
 
+    def test_payoff_estimates_annotated_in_database(self):
+        """Test the queryset annotations agree with the Python estimates."""
+        for balance, rate, minimum in (
+            ('10000.00', '0.0', '500.00'),
+            ('4500.00', '22.99', '135.00'),
+            ('28000.00', '4.25', '290.00'),
+            ('50000.00', '24.00', '100.00'),
+        ):
+            Loan.objects.create(
+                user=self.user,
+                name='Test Loan',
+                balance=Decimal(balance),
+                interest_rate=Decimal(rate),
+                minimum_payment=Decimal(minimum)
+            )
+
+        for annotated in Loan.objects.filter(user=self.user).with_payoff_estimates():
+            loan = Loan.objects.get(pk=annotated.pk)
+            self.assertEqual(annotated.estimated_payoff_months, loan.estimated_payoff_months)
+            if loan.total_interest_paid is None:
+                self.assertIsNone(annotated.total_interest_paid)
+            else:
+                self.assertAlmostEqual(annotated.total_interest_paid, loan.total_interest_paid, places=2)
+
+        # A minimum below the monthly interest never pays the loan off
+        never = Loan.objects.filter(user=self.user).with_payoff_estimates().get(minimum_payment=Decimal('100.00'))
+        self.assertIsNone(never.payoff_months_estimate)
+
 
 class LoanAPITest(APITestCase):
     """Test cases for Loan API endpoints."""
@@ -92,6 +120,14 @@ class LoanAPITest(APITestCase):
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['name'], 'Test Loan')
 
+    def test_list_loans_includes_payoff_estimates(self):
+        """Test listed loans carry the payoff estimates."""
+        response = self.client.get('/api/loans/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        loan_data = response.data['results'][0]
+        self.assertEqual(loan_data['estimated_payoff_months'], self.loan.estimated_payoff_months)
+        self.assertAlmostEqual(loan_data['total_interest_paid'], self.loan.total_interest_paid, places=2)
+
     def test_create_loan(self):
         """Test creating a new loan."""
         data = {
@@ -136,6 +172,17 @@ class LoanAPITest(APITestCase):
         self.loan.refresh_from_db()
         self.assertEqual(self.loan.name, 'Updated Loan')
 
+    def test_update_returns_fresh_payoff_estimates(self):
+        """Test an update response reflects the new balance, not the stored one."""
+        self.loan.interest_rate = Decimal('0.00')
+        self.loan.minimum_payment = Decimal('500.00')
+        self.loan.save()
+
+        response = self.client.patch(f'/api/loans/{self.loan.id}/', {'balance': '1000.00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['estimated_payoff_months'], 2)
+        self.assertEqual(response.data['total_interest_paid'], 0)
+
     def test_delete_loan(self):
         """Test deleting a loan."""
         response = self.client.delete(f'/api/loans/{self.loan.id}/')
@@ -174,6 +221,104 @@ class LoanAPITest(APITestCase):
         self.loan.refresh_from_db()
         self.assertTrue(self.loan.is_active)
 
+    def test_bulk_import_json(self):
+        """Test importing a JSON array of loans in one request."""
+        data = [
+            {'name': 'Card A', 'balance': '1500.00', 'interest_rate': '19.99', 'minimum_payment': '45.00'},
+            {'name': 'Card B', 'balance': '700.00', 'interest_rate': '24.50', 'minimum_payment': '25.00'},
+        ]
+        response = self.client.post('/api/loans/import/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([loan['name'] for loan in response.data], ['Card A', 'Card B'])
+        self.assertEqual(Loan.objects.filter(user=self.user).count(), 3)
+
+    def test_bulk_import_csv(self):
+        """Test importing a CSV upload, with inactive loans not counting towards the limit."""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        content = (
+            'name,balance,interest_rate,minimum_payment,is_active,due_date\n'
+            'Card A,1500.00,19.99,45.00,true,\n'
+            'Card B,700.00,24.50,25.00,true,2024-06-15\n'
+            'Old Card,300.00,18.00,20.00,false,\n'
+        )
+        upload = SimpleUploadedFile('loans.csv', content.encode(), content_type='text/csv')
+        response = self.client.post('/api/loans/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Loan.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(Loan.objects.filter(user=self.user, is_active=True).count(), 3)
+
+    def test_bulk_import_reports_errors_per_row(self):
+        """Test invalid rows are reported by number and nothing is imported."""
+        data = [
+            {'name': 'Card A', 'balance': '1500.00', 'interest_rate': '19.99', 'minimum_payment': '45.00'},
+            {'name': 'Card B', 'balance': '-700.00', 'interest_rate': '24.50', 'minimum_payment': '25.00'},
+        ]
+        response = self.client.post('/api/loans/import/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2])
+        self.assertIn('balance', response.data['errors'][0]['errors'])
+        self.assertEqual(Loan.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_import_checks_loan_limit(self):
+        """Test a batch that would exceed the loan limit is rejected as a whole."""
+        data = [
+            {'name': f'Card {number}', 'balance': '500.00', 'interest_rate': '19.99', 'minimum_payment': '25.00'}
+            for number in range(3)
+        ]
+        response = self.client.post('/api/loans/import/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Loan.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_partial_update(self):
+        """Test updating several loans in one request returns the new summary."""
+        second = Loan.objects.create(
+            user=self.user,
+            name='Second Loan',
+            balance=Decimal('5000.00'),
+            interest_rate=Decimal('4.0'),
+            minimum_payment=Decimal('100.00')
+        )
+        data = {
+            str(self.loan.id): {'balance': '9800.00'},
+            str(second.id): {'balance': '4900.00', 'minimum_payment': '120.00'},
+        }
+        response = self.client.patch('/api/loans/bulk/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(response.data['summary']['total_balance'], '14700.00')
+
+        self.loan.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(self.loan.balance, Decimal('9800.00'))
+        self.assertEqual(second.minimum_payment, Decimal('120.00'))
+        self.assertEqual(self.loan.updated_at, second.updated_at)
+
+    def test_bulk_partial_update_reports_errors_by_id(self):
+        """Test invalid or unknown loans are reported and nothing is saved."""
+        other_user = User.objects.create_user(username='otheruser', password='otherpass123')
+        other_loan = Loan.objects.create(
+            user=other_user,
+            name='Other Loan',
+            balance=Decimal('1000.00'),
+            interest_rate=Decimal('5.0'),
+            minimum_payment=Decimal('50.00')
+        )
+        data = {
+            str(self.loan.id): {'balance': '9800.00', 'minimum_payment': '-5.00'},
+            str(other_loan.id): {'balance': '1.00'},
+            'not-an-id': {'balance': '1.00'},
+        }
+        response = self.client.patch('/api/loans/bulk/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data['errors']), set(data))
+        self.assertIn('minimum_payment', response.data['errors'][str(self.loan.id)])
+
+        self.loan.refresh_from_db()
+        other_loan.refresh_from_db()
+        self.assertEqual(self.loan.balance, Decimal('10000.00'))
+        self.assertEqual(other_loan.balance, Decimal('1000.00'))
+
     def test_unauthorized_access(self):
         """Test that users can't access other users' loans."""
         other_user = User.objects.create_user(
@@ -2,16 +2,23 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import JSONParser, MultiPartParser
+from django.db import transaction
 from django.db.models import Sum, Avg, Count
 from django.shortcuts import render, redirect, get_object_or_404
+from django.utils import timezone
+from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
-from billing.permissions import HasLoanLimit
+from billing.permissions import HasLoanLimit, remaining_loan_slots
 from .models import Loan
 from .serializers import LoanSerializer, LoanSummarySerializer
 from .forms import LoanForm
+import csv
+import io
+import uuid
 
 
 class LoanViewSet(viewsets.ModelViewSet):
@@ -20,26 +27,35 @@ class LoanViewSet(viewsets.ModelViewSet):
     serializer_class = LoanSerializer
     permission_classes = [IsAuthenticated, HasLoanLimit]
 
+    MAX_IMPORT_ROWS = 500
+
     def get_queryset(self):
-        """Return loans for the authenticated user."""
-        return Loan.objects.filter(user=self.request.user)
+        """Return loans for the authenticated user.
+
+        Listings and single loans read their payoff estimates from the
+        database; other actions leave them off, so responses after a save
+        calculate them from the saved values.
+        """
+        loans = Loan.objects.filter(user=self.request.user)
+        if self.action in ('list', 'retrieve'):
+            loans = loans.with_payoff_estimates()
+        return loans
 
     def perform_create(self, serializer):
         """Create a loan for the authenticated user."""
         serializer.save(user=self.request.user)
 
-    @action(detail=False, methods=['get'])
-    def summary(self, request):
-        """Get summary statistics for user's loans."""
-        loans = self.get_queryset().filter(is_active=True)
+    def summary_data(self):
+        """Summary statistics for the user's active loans."""
+        loans = Loan.objects.filter(user=self.request.user, is_active=True)
 
         if not loans.exists():
-            return Response({
+            return {
                 'total_loans': 0,
                 'total_balance': 0,
                 'total_minimum_payments': 0,
                 'average_interest_rate': 0
-            })
+            }
 
         summary_data = loans.aggregate(
             total_loans=Count('id'),
@@ -49,7 +65,140 @@ class LoanViewSet(viewsets.ModelViewSet):
         )
 
         serializer = LoanSummarySerializer(summary_data)
-        return Response(serializer.data)
+        return serializer.data
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """Get summary statistics for user's loans."""
+        return Response(self.summary_data())
+
+    @action(detail=False, methods=['patch'], url_path='bulk', permission_classes=[IsAuthenticated])
+    def bulk_partial_update(self, request):
+        """Partially update many loans at once, returning the new loan summary.
+
+        Takes ``{loan id: {field: value, ...}}``. Every change is validated
+        first and errors are reported by loan id; if all are valid the loans
+        are saved with one ``bulk_update`` in a single transaction, sharing
+        one ``updated_at``. The loan limit only applies to loans being
+        reactivated, as updating existing loans adds none.
+        """
+        if not isinstance(request.data, dict) or not request.data:
+            return Response(
+                {'error': 'Send an object mapping loan ids to the fields to change.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        errors = {}
+        loan_ids = []
+        for loan_id in request.data:
+            try:
+                loan_ids.append(uuid.UUID(loan_id))
+            except ValueError:
+                errors[loan_id] = ['Not a valid loan id.']
+
+        with transaction.atomic():
+            loans = {
+                str(loan.id): loan
+                for loan in Loan.objects.select_for_update().filter(user=request.user, pk__in=loan_ids)
+            }
+            valid = {}
+            for loan_id, changes in request.data.items():
+                if loan_id in errors:
+                    continue
+                loan = loans.get(str(uuid.UUID(loan_id)))
+                if loan is None:
+                    errors[loan_id] = ['Not found.']
+                    continue
+                serializer = self.get_serializer(loan, data=changes, partial=True)
+                if serializer.is_valid():
+                    valid[loan_id] = serializer
+                else:
+                    errors[loan_id] = serializer.errors
+
+            if errors:
+                return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+            reactivated = sum(
+                1 for serializer in valid.values()
+                if serializer.validated_data.get('is_active') and not serializer.instance.is_active
+            )
+            if reactivated and reactivated > remaining_loan_slots(request.user):
+                return Response(
+                    {'error': f'Reactivating {reactivated} loans would exceed your loan limit.'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+
+            fields = {'updated_at'}
+            updated_at = timezone.now()
+            for serializer in valid.values():
+                for field, value in serializer.validated_data.items():
+                    setattr(serializer.instance, field, value)
+                    fields.add(field)
+                serializer.instance.updated_at = updated_at
+            Loan.objects.bulk_update([serializer.instance for serializer in valid.values()], sorted(fields))
+
+        return Response({'updated': len(valid), 'summary': self.summary_data()})
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[JSONParser, MultiPartParser])
+    def bulk_import(self, request):
+        """Create many loans at once from a JSON array or an uploaded CSV file.
+
+        Every row is validated before anything is saved. The loan limit is
+        checked once for the whole batch, in the same transaction that inserts
+        the loans and with the user locked, so concurrent imports cannot both
+        pass it. Validation errors are reported per row, numbered from 1.
+        """
+        upload = request.FILES.get('file')
+        if upload is not None:
+            try:
+                reader = csv.DictReader(io.StringIO(upload.read().decode('utf-8-sig')))
+            except UnicodeDecodeError:
+                return Response({'error': 'CSV files must be UTF-8 encoded.'}, status=status.HTTP_400_BAD_REQUEST)
+            # Blank cells are left out so optional columns can be empty
+            rows = [{field: value for field, value in row.items() if field and value} for row in reader]
+        elif isinstance(request.data, list):
+            rows = request.data
+        else:
+            return Response(
+                {'error': 'Send a JSON array of loans or a CSV file as "file".'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not rows:
+            return Response({'error': 'No loans to import.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > self.MAX_IMPORT_ROWS:
+            return Response(
+                {'error': f'At most {self.MAX_IMPORT_ROWS} loans can be imported at once.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = self.get_serializer(data=rows, many=True)
+        if not serializer.is_valid():
+            # Rows that passed have an empty entry, so only the failing rows are reported
+            return Response(
+                {'errors': [
+                    {'row': index + 1, 'errors': errors}
+                    for index, errors in enumerate(serializer.errors) if errors
+                ]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        active_count = sum(1 for attrs in serializer.validated_data if attrs.get('is_active', True))
+        with transaction.atomic():
+            # Lock the user so concurrent imports check the limit one at a time
+            get_user_model().objects.select_for_update().get(pk=request.user.pk)
+            available = remaining_loan_slots(request.user)
+            if active_count > available:
+                return Response(
+                    {'error': f'Importing {active_count} active loans would exceed your loan limit '
+                              f'({max(available, 0)} remaining).'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            loans = Loan.objects.bulk_create(
+                [Loan(user=request.user, **attrs) for attrs in serializer.validated_data]
+            )
+
+        return Response(self.get_serializer(loans, many=True).data, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['post'])
     def toggle_active(self, request, pk=None):
@@ -109,7 +258,7 @@ def dashboard(request):
 @login_required
 def loan_list(request):
     """List all user's loans."""
-    loans = Loan.objects.filter(user=request.user)
+    loans = Loan.objects.filter(user=request.user).with_payoff_estimates()
     return render(request, 'loans/loan_list.html', {'loans': loans})
 
 
@@ -130,7 +279,7 @@ def loan_create(request):
     # Get loan summary data for the sidebar
     active_loans = Loan.objects.filter(user=request.user, is_active=True)
     total_balance = active_loans.aggregate(Sum('balance'))['balance__sum'] or 0
-    
+
     context = {
         'form': form,
         'title': 'Add New Loan',
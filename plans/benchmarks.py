@@ -0,0 +1,155 @@
+"""Benchmarks for the plan calculation engines.
+
+Portfolios are generated synthetically from a seed, so every run times the
+same inputs without touching the database. Each case records the best wall
+time over a few repeats, the peak memory allocated during one extra run
+under ``tracemalloc``, and the size of the stored ``plan_data`` JSON. Results
+can be saved as a baseline that later runs are compared against.
+"""
+
+import json
+import random
+import time
+import tracemalloc
+import uuid
+from decimal import Decimal
+
+from loans.models import Loan
+from .cache import plan_cache
+from .models import DebtPlan
+from .schedules import encode_plan_data
+
+SIZES = (1, 10, 50)
+PROFILES = ('short', 'long', 'capped')
+METHODS = ('snowball', 'avalanche', 'consolidation')
+ENGINES = ('python', 'numpy', 'event')
+
+# Extra payment and consolidation term used for each profile
+PROFILE_SETTINGS = {
+    'short': (Decimal('500.00'), 24),
+    'long': (Decimal('100.00'), 120),
+    'capped': (Decimal('0.00'), 360),
+}
+
+# Differences below these are noise rather than regressions
+MIN_SECONDS = 0.0005
+MIN_BYTES = 1024
+
+
+def _money(amount):
+    return Decimal(str(round(amount, 2)))
+
+
+def synthetic_portfolio(size, profile, seed=0):
+    """Generate ``size`` unsaved loans for a payoff profile.
+
+    ``short`` portfolios are paid off within a couple of years and ``long``
+    ones take a decade or more. In ``capped`` portfolios every loan charges
+    interest and the minimums together fall below the interest on any single
+    loan, so whichever loan the budget is poured into still grows and plans
+    run to the 600 month cap. Rates range from interest-free up to 30%.
+    """
+    rng = random.Random(f'{seed}-{size}-{profile}')
+    terms = []
+    for number in range(size):
+        balance = rng.uniform(300, 40000)
+        rate = 0 if rng.random() < 0.1 else rng.uniform(2, 30)
+        if profile == 'capped':
+            rate = rng.uniform(12, 30)
+        interest = balance * rate / 1200
+        if profile == 'short':
+            minimum = balance / rng.uniform(6, 18) + interest
+        elif profile == 'long':
+            minimum = balance / rng.uniform(120, 240) + interest
+        else:
+            minimum = None
+        terms.append((rng.getrandbits(128), balance, rate, interest, minimum))
+
+    if profile == 'capped':
+        # Leave room for rounding each minimum up to the cent
+        share = min(interest for _, _, _, interest, _ in terms) * 0.8 / size
+        terms = [(loan_id, balance, rate, interest, share) for loan_id, balance, rate, interest, _ in terms]
+
+    return [
+        Loan(
+            id=uuid.UUID(int=loan_id),
+            name=f'Loan {number + 1}',
+            balance=_money(balance),
+            interest_rate=_money(rate),
+            minimum_payment=max(_money(minimum), Decimal('0.01'))
+        )
+        for number, (loan_id, balance, rate, _, minimum) in enumerate(terms)
+    ]
+
+
+def benchmark_case(method, engine, profile, size, repeat=3, seed=0):
+    """Time one plan calculation and measure its peak memory and stored size."""
+    loans = synthetic_portfolio(size, profile, seed=seed)
+    extra_payment, term = PROFILE_SETTINGS[profile]
+    plan = DebtPlan(
+        name='Benchmark',
+        method=method,
+        extra_payment=extra_payment,
+        consolidation_rate=Decimal('9.99'),
+        consolidation_term=term
+    )
+
+    # The consolidation baseline is cached per loan set, so time it cold
+    timings = []
+    for _ in range(repeat):
+        plan_cache.clear()
+        started = time.perf_counter()
+        plan_data = plan.calculate_plan(engine=engine, loans=loans)
+        timings.append(time.perf_counter() - started)
+
+    plan_cache.clear()
+    tracemalloc.start()
+    try:
+        plan.calculate_plan(engine=engine, loans=loans)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'case': f'{method}/{engine}/{profile}/{size}',
+        'seconds': round(min(timings), 6),
+        'peak_memory': peak_memory,
+        'json_bytes': len(json.dumps(encode_plan_data(plan_data))),
+        'payoff_months': plan_data['payoff_months'],
+    }
+
+
+def run_benchmarks(sizes=SIZES, profiles=PROFILES, methods=METHODS, engines=ENGINES, repeat=3, seed=0):
+    """Run every combination of method, engine, profile and portfolio size.
+
+    Consolidation only depends on the engine for ``cents``, so it is timed
+    once with the reference engine.
+    """
+    results = []
+    for method in methods:
+        method_engines = ['python'] if method == 'consolidation' else engines
+        for engine in method_engines:
+            for profile in profiles:
+                for size in sizes:
+                    results.append(benchmark_case(method, engine, profile, size, repeat=repeat, seed=seed))
+    return results
+
+
+def find_regressions(results, baseline, threshold=0.25):
+    """Compare results with a baseline and describe every metric that got worse.
+
+    A metric regresses when it grew by more than ``threshold`` (a fraction)
+    and by more than the noise floor. Cases missing from the baseline are
+    skipped.
+    """
+    previous = {result['case']: result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result['case'])
+        if before is None:
+            continue
+        for metric, noise in (('seconds', MIN_SECONDS), ('peak_memory', MIN_BYTES), ('json_bytes', MIN_BYTES)):
+            old, new = before[metric], result[metric]
+            if new > old * (1 + threshold) and new - old > noise:
+                regressions.append(f"{result['case']} {metric}: {old} -> {new}")
+    return regressions
@@ -0,0 +1,96 @@
+"""Bulk recalculation of stored plans.
+
+Plans are streamed from the database in primary key order and grouped into
+chunks. Each chunk's loans are fetched in one query, then the chunk is
+calculated in a pool of worker processes with the multi-portfolio engine.
+Workers never touch the database: they receive the plans and loans and send
+back the plans with fresh results, which are written with ``bulk_update``.
+Chunks are written in the order they were read, so the last written plan id
+is a safe point to resume from.
+"""
+
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.utils import timezone
+
+from .cache import plan_inputs
+from .engines import DEFAULT_ENGINE
+from .models import DebtPlan
+from .schedules import encode_plan_data
+
+RESULT_FIELDS = [
+    'total_debt', 'total_interest_saved', 'payoff_months', 'total_payments', 'plan_data', 'status', 'updated_at'
+]
+
+
+def calculate_chunk(plans, loans_by_user):
+    """Calculate a chunk of plans and store the results on them, without saving."""
+    calculated_at = timezone.localdate().isoformat()
+    updated_at = timezone.now()
+    for plan, plan_data in zip(plans, DebtPlan.calculate_many(plans, loans_by_user=loans_by_user)):
+        loans = loans_by_user.get(plan.user_id, [])
+        # calculate_many batches payoff plans with loans through the numpy engine
+        batched = plan.method in ('snowball', 'avalanche') and loans
+        plan.set_plan_data(dict(
+            encode_plan_data(plan_data),
+            calculated_at=calculated_at,
+            inputs=plan_inputs(plan, loans),
+            engine='numpy' if batched else DEFAULT_ENGINE
+        ))
+        plan.updated_at = updated_at
+    return plans
+
+
+def _chunks(queryset, chunk_size):
+    plans = queryset.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(itertools.islice(plans, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _write(plans, batch_size):
+    DebtPlan.objects.bulk_update(plans, RESULT_FIELDS, batch_size=batch_size)
+    return len(plans), plans[-1].pk
+
+
+def recalculate_plans(queryset, workers=None, chunk_size=500, batch_size=500):
+    """Recalculate and save every plan in a queryset, yielding progress after each chunk.
+
+    ``workers`` processes calculate chunks in parallel, defaulting to the CPU
+    count; with ``workers=0`` chunks are calculated in this process. At most
+    two chunks per worker are in flight, so memory stays flat however many
+    plans there are. Yields ``(plans written so far, last plan id written)``.
+    """
+    written = 0
+    chunks = (
+        (chunk, DebtPlan.active_loans_by_user(chunk))
+        for chunk in _chunks(queryset.order_by('pk'), chunk_size)
+    )
+
+    if workers == 0:
+        for chunk, loans_by_user in chunks:
+            count, last_id = _write(calculate_chunk(chunk, loans_by_user), batch_size)
+            written += count
+            yield written, last_id
+        return
+
+    workers = workers or os.cpu_count() or 1
+    # Spawned workers need the app registry before they can unpickle plans
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        in_flight = deque()
+        for chunk, loans_by_user in chunks:
+            in_flight.append(pool.submit(calculate_chunk, chunk, loans_by_user))
+            if len(in_flight) >= 2 * workers:
+                count, last_id = _write(in_flight.popleft().result(), batch_size)
+                written += count
+                yield written, last_id
+        while in_flight:
+            count, last_id = _write(in_flight.popleft().result(), batch_size)
+            written += count
+            yield written, last_id
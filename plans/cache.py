@@ -0,0 +1,192 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.conf import settings
+
+from .engines import DEFAULT_ENGINE, minimum_payment_baseline
+from .schedules import encode_plan_data, is_columnar
+
+
+def _amount(value):
+    """Format a money or rate value the same way however it was entered."""
+    return f"{Decimal(value or 0):.2f}"
+
+
+def plan_cache_key(plan, loans, engine=DEFAULT_ENGINE, include_schedule=True):
+    """Build a stable hash of everything a plan calculation depends on.
+
+    Loan ids and owners are deliberately left out so identical portfolios
+    share an entry; loans are listed in the order the engine receives them.
+    """
+    inputs = {
+        'method': plan.method,
+        'extra_payment': _amount(plan.extra_payment),
+        'engine': engine,
+        'include_schedule': include_schedule,
+        'loans': [
+            [_amount(loan.balance), _amount(loan.interest_rate), _amount(loan.minimum_payment)]
+            for loan in loans
+        ],
+    }
+    if plan.method == 'consolidation':
+        # No rate means no offer at all, which must not share an entry with a 0% offer
+        rate = plan.consolidation_rate
+        inputs['consolidation_rate'] = None if rate is None else _amount(rate)
+        inputs['consolidation_term'] = plan.consolidation_term
+
+    payload = json.dumps(inputs, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def baseline_cache_key(loans):
+    """Build a hash of a loan set for its minimum-payment baseline.
+
+    Loans are paid independently in the baseline, so their order does not
+    matter and the same set in any order shares an entry.
+    """
+    amounts = sorted(
+        [_amount(loan.balance), _amount(loan.interest_rate), _amount(loan.minimum_payment)]
+        for loan in loans
+    )
+    payload = json.dumps(['baseline', amounts], separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def plan_inputs(plan, loans):
+    """Snapshot the inputs a snowball/avalanche plan was calculated from, keyed by loan id.
+
+    Stored alongside the plan data so a later recalculation can tell which
+    loans changed since.
+    """
+    return {
+        'method': plan.method,
+        'extra_payment': _amount(plan.extra_payment),
+        'loans': {
+            str(loan.id): [_amount(loan.balance), _amount(loan.interest_rate), _amount(loan.minimum_payment)]
+            for loan in loans
+        },
+    }
+
+
+class PlanCalculationCache:
+    """In-process LRU cache of calculated plan data with a time-to-live.
+
+    Entries hold plan data with the schedule already in the columnar layout,
+    together with the loan ids it was calculated for, so a hit for another
+    user's identical portfolio only has to swap the loan id header.
+    """
+
+    def __init__(self, max_entries=256, timeout=300):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached ``(loan_ids, plan_data)`` for a key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def set(self, key, loan_ids, plan_data):
+        """Store calculated plan data, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, loan_ids, plan_data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Return hit/miss counters for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0,
+            }
+
+    def calculate(self, plan, engine=DEFAULT_ENGINE, include_schedule=True, loans=None):
+        """Return plan data for a plan, running the engine only on a cache miss.
+
+        The result has its schedule in the columnar layout, ready to be
+        stored on ``plan.plan_data``.
+        """
+        loans = list(plan.loans) if loans is None else loans
+        loan_ids = [str(loan.id) for loan in loans]
+        key = plan_cache_key(plan, loans, engine=engine, include_schedule=include_schedule)
+
+        cached = self.get(key)
+        if cached is None:
+            plan_data = encode_plan_data(
+                plan.calculate_plan(engine=engine, include_schedule=include_schedule, loans=loans)
+            )
+            self.set(key, loan_ids, plan_data)
+            return plan_data
+
+        cached_ids, plan_data = cached
+        plan_data = dict(plan_data)
+        schedule = plan_data.get('schedule')
+        if is_columnar(schedule) and 'loan_ids' in schedule and cached_ids != loan_ids:
+            # Same inputs by position, so swap in this portfolio's loan ids
+            mapping = dict(zip(cached_ids, loan_ids))
+            schedule = dict(schedule)
+            schedule['loan_ids'] = [mapping[loan_id] for loan_id in schedule['loan_ids']]
+            plan_data['schedule'] = schedule
+        return plan_data
+
+    def baseline(self, loans):
+        """Return ``(total_interest, payoff_months, paid_off)`` paying only each loan's minimum.
+
+        The baseline depends on the loans alone, so it is simulated once per
+        loan set and shared by every consolidation rate and term tried.
+        """
+        key = baseline_cache_key(loans)
+        cached = self.get(key)
+        if cached is not None:
+            return cached[1]
+
+        baseline = minimum_payment_baseline([
+            {
+                'id': loan.id,
+                'balance': float(loan.balance),
+                'minimum_payment': float(loan.minimum_payment),
+                'monthly_interest_rate': float(loan.monthly_interest_rate)
+            }
+            for loan in loans
+        ])
+        self.set(key, None, baseline)
+        return baseline
+
+
+plan_cache = PlanCalculationCache(
+    max_entries=getattr(settings, 'PLAN_CACHE_MAX_ENTRIES', 256),
+    timeout=getattr(settings, 'PLAN_CACHE_TIMEOUT', 300),
+)
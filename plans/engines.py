@@ -0,0 +1,757 @@
+import math
+from fractions import Fraction
+
+import numpy as np
+
+from .schedules import from_cents, to_cents
+
+
+ENGINE_CHOICES = [
+    ('python', 'Reference Python engine'),
+    ('numpy', 'Vectorized NumPy engine'),
+    ('event', 'Event-driven simulator'),
+    ('cents', 'Integer-cent fixed-point engine'),
+]
+
+DEFAULT_ENGINE = 'python'
+
+MAX_MONTHS = 600  # Max 50 years
+BASELINE_MAX_MONTHS = 360  # Horizon of the minimum-payment baseline, 30 years
+PAYOFF_THRESHOLD = 0.01  # Account for floating point precision
+PAYOFF_CENTS = 1
+RATE_SCALE = 120000  # Monthly rates in units of 1/120000, i.e. APR in hundredths of a percent
+
+
+def _advance_month(balance, rates, monthly_payment):
+    """Advance the active loans (in priority order) by one month.
+
+    The whole monthly budget is poured into the loans in priority order,
+    each loan taking at most its current balance, which is exactly what the
+    reference loop does. Returns ``(payment, interest, new_balance)``.
+    """
+    # Budget left over once every higher-priority loan has been cleared
+    paid_before = np.cumsum(balance) - balance
+    payment = np.clip(monthly_payment - paid_before, 0, balance)
+    interest = balance * rates
+    return payment, interest, balance + interest - payment
+
+
+def _schedule_row(month, active_ids, payment, interest, new_balance, remaining_balance):
+    """Build one month of the legacy schedule layout."""
+    return {
+        'month': month,
+        'payments': {
+            loan_id: {'payment': pay, 'interest': inte, 'balance': bal}
+            for loan_id, pay, inte, bal in zip(
+                active_ids,
+                payment.round(2).tolist(),
+                interest.round(2).tolist(),
+                np.maximum(new_balance, 0).round(2).tolist(),
+            )
+        },
+        'total_payment': float(payment.sum()),
+        'remaining_balance': round(remaining_balance, 2),
+    }
+
+
+def _load_arrays(loan_data):
+    """Split working loan dicts into ids and balance/rate arrays."""
+    ids = [str(loan['id']) for loan in loan_data]
+    balances = np.array([loan['balance'] for loan in loan_data], dtype=float)
+    rates = np.array([loan['monthly_interest_rate'] for loan in loan_data], dtype=float)
+    return ids, balances, rates
+
+
+class LoanState:
+    """Working state of one loan in the reference engine.
+
+    Active loans form a singly linked list in payoff priority order through
+    ``next``, so a paid off loan is retired by relinking its predecessor
+    instead of searching and shifting a list.
+    """
+
+    __slots__ = ('id', 'balance', 'minimum_payment', 'rate', 'next')
+
+    def __init__(self, loan_id, balance, minimum_payment, rate):
+        self.id = loan_id
+        self.balance = balance
+        self.minimum_payment = minimum_payment
+        self.rate = rate
+        self.next = None
+
+
+def _active_set(loan_data):
+    """Link the loans with a balance into an active set behind a sentinel head."""
+    head = tail = LoanState(None, 0.0, 0.0, 0.0)
+    for loan in loan_data:
+        if loan['balance'] > 0:
+            tail.next = tail = LoanState(
+                str(loan['id']), loan['balance'], loan['minimum_payment'], loan['monthly_interest_rate']
+            )
+    return head
+
+
+def simulate_payoff_python(loan_data, monthly_payment, max_months=MAX_MONTHS, include_schedule=True,
+                           start_month=0):
+    """Simulate a snowball/avalanche payoff one loan at a time.
+
+    This is the reference engine the others are checked against. Each loan
+    takes its minimum and then whatever is left of the monthly budget, in
+    priority order, and is retired once it is down to a cent.
+
+    Returns ``(schedule, total_interest, months, remaining_loans)``.
+    """
+    head = _active_set(loan_data)
+    remaining = sum(1 for loan in loan_data if loan['balance'] > 0)
+
+    schedule = []
+    total_interest = 0
+    current_month = start_month
+
+    while head.next is not None and current_month < max_months:
+        current_month += 1
+        available_payment = monthly_payment
+        total_payment = 0
+        remaining_balance = 0
+        payments = {}
+
+        previous, loan = head, head.next
+        while loan is not None:
+            balance = loan.balance
+
+            # Pay the minimum first, then any remaining budget as extra
+            payment = min(loan.minimum_payment, balance)
+            if available_payment > payment:
+                payment += min(available_payment - payment, balance - payment)
+                available_payment -= payment
+            else:
+                payment = min(available_payment, balance)
+                available_payment = 0
+
+            interest = balance * loan.rate
+            total_interest += interest
+            loan.balance = balance = balance + interest - payment
+            total_payment += payment
+
+            if include_schedule:
+                payments[loan.id] = {
+                    'payment': round(payment, 2),
+                    'interest': round(interest, 2),
+                    'balance': round(max(0, balance), 2)
+                }
+
+            if balance <= PAYOFF_THRESHOLD:
+                previous.next = loan.next
+                remaining -= 1
+            else:
+                remaining_balance += balance
+                previous = loan
+            loan = loan.next
+
+        if include_schedule:
+            schedule.append({
+                'month': current_month,
+                'payments': payments,
+                'total_payment': total_payment,
+                'remaining_balance': round(remaining_balance, 2)
+            })
+
+    return schedule, total_interest, current_month, remaining
+
+
+def simulate_payoff(loan_data, monthly_payment, max_months=MAX_MONTHS, include_schedule=True, start_month=0):
+    """Simulate a snowball/avalanche payoff with all loans advanced per month at once.
+
+    ``loan_data`` is the list of working loan dicts built by ``DebtPlan``,
+    already sorted into payoff priority order. A run can be resumed from a
+    checkpoint by passing the balances at the end of ``start_month``.
+
+    Returns ``(schedule, total_interest, months, remaining_loans)``.
+    """
+    ids, balances, rates = _load_arrays(loan_data)
+
+    schedule = []
+    total_interest = 0.0
+    current_month = start_month
+    index = np.flatnonzero(balances > 0)
+    active_ids = [ids[i] for i in index.tolist()]
+
+    while index.size and current_month < max_months:
+        current_month += 1
+        payment, interest, new_balance = _advance_month(balances[index], rates[index], monthly_payment)
+        balances[index] = new_balance
+        total_interest += float(interest.sum())
+        row_ids = active_ids
+
+        # Retire paid off loans; the active ids only change on a payoff
+        paid_off = new_balance <= PAYOFF_THRESHOLD
+        if paid_off.any():
+            index = index[~paid_off]
+            active_ids = [ids[i] for i in index.tolist()]
+
+        if include_schedule:
+            schedule.append(_schedule_row(
+                current_month, row_ids, payment, interest, new_balance, float(balances[index].sum())
+            ))
+
+    return schedule, total_interest, current_month, int(index.size)
+
+
+def simulate_portfolios(portfolios, monthly_payments, max_months=MAX_MONTHS, include_schedule=True):
+    """Simulate many snowball/avalanche plans together, one month at a time.
+
+    Each portfolio is a list of working loan dicts in its own priority
+    order, as passed to ``simulate_payoff``. They are packed into a
+    ``(plans, loans)`` balance matrix padded with zero balances, which take
+    no payment and charge no interest, and every plan still running is
+    advanced in the same array operations. Finished plans drop out of the
+    matrix.
+
+    Returns one ``(schedule, total_interest, months, remaining_loans)`` tuple
+    per portfolio, as ``simulate_payoff`` would.
+    """
+    width = max((len(loan_data) for loan_data in portfolios), default=0)
+    ids = []
+    balances = np.zeros((len(portfolios), width))
+    rates = np.zeros((len(portfolios), width))
+    for row, loan_data in enumerate(portfolios):
+        row_ids, row_balances, row_rates = _load_arrays(loan_data)
+        ids.append(row_ids)
+        balances[row, :len(loan_data)] = np.where(row_balances > 0, row_balances, 0)
+        rates[row, :len(loan_data)] = row_rates
+    budgets = np.asarray(monthly_payments, dtype=float)
+
+    schedules = [[] for _ in portfolios]
+    total_interest = np.zeros(len(portfolios))
+    payoff_months = np.zeros(len(portfolios), dtype=int)
+    rows = np.flatnonzero((balances > 0).any(axis=1))
+    balances, rates, budgets = balances[rows], rates[rows], budgets[rows]
+    current_month = 0
+
+    while rows.size and current_month < max_months:
+        current_month += 1
+        active = balances > 0
+        paid_before = np.cumsum(balances, axis=1) - balances
+        payment = np.clip(budgets[:, None] - paid_before, 0, balances)
+        interest = balances * rates
+        new_balance = balances + interest - payment
+        balances = np.where(new_balance <= PAYOFF_THRESHOLD, 0, new_balance)
+
+        total_interest[rows] += interest.sum(axis=1)
+        payoff_months[rows] = current_month
+
+        if include_schedule:
+            remaining_balance = balances.sum(axis=1).tolist()
+            for position, row in enumerate(rows.tolist()):
+                mask = active[position]
+                schedules[row].append(_schedule_row(
+                    current_month, [ids[row][i] for i in np.flatnonzero(mask).tolist()],
+                    payment[position][mask], interest[position][mask], new_balance[position][mask],
+                    remaining_balance[position]
+                ))
+
+        running = balances.any(axis=1)
+        if not running.all():
+            rows, balances, rates, budgets = rows[running], balances[running], rates[running], budgets[running]
+
+    remaining_loans = np.zeros(len(portfolios), dtype=int)
+    remaining_loans[rows] = (balances > 0).sum(axis=1)
+    return list(zip(schedules, total_interest.tolist(), payoff_months.tolist(), remaining_loans.tolist()))
+
+
+class PayoffTimeline:
+    """Result of an event-driven payoff simulation.
+
+    The run is stored as segments of ``(start_month, months, index, balance)``
+    during which no loan is paid off, so monthly rows are only rebuilt when
+    ``iter_schedule()`` is consumed.
+    """
+
+    def __init__(self, ids, rates, monthly_payment):
+        self.ids = ids
+        self.rates = rates
+        self.monthly_payment = monthly_payment
+        self.segments = []
+        self.total_interest = 0.0
+        self.payoff_months = 0
+        self.remaining_loans = 0
+
+    def iter_schedule(self):
+        """Yield the schedule one month at a time in the legacy layout."""
+        for start_month, months, index, balance in self.segments:
+            active_ids = [self.ids[i] for i in index.tolist()]
+            rates = self.rates[index]
+            for month in range(start_month, start_month + months):
+                payment, interest, balance = _advance_month(balance, rates, self.monthly_payment)
+                remaining_balance = float(balance[balance > PAYOFF_THRESHOLD].sum())
+                yield _schedule_row(month, active_ids, payment, interest, balance, remaining_balance)
+
+
+def _balance_after(balance, rate, monthly_payment, months):
+    """Closed-form balance of a loan paying ``monthly_payment`` for ``months``."""
+    if rate == 0:
+        return balance - months * monthly_payment
+    return (balance - monthly_payment / rate) * (1 + rate) ** months + monthly_payment / rate
+
+
+def _months_absorbing_budget(balance, rate, monthly_payment, limit):
+    """Count the months the head loan keeps taking the whole budget.
+
+    Solves the annuity recurrence ``b(t+1) = b(t) * (1 + r) - P`` for the
+    last month whose opening balance is still at least ``P``. The result is
+    checked against the closed form so rounding in the logarithm can never
+    jump past a payoff.
+    """
+    if balance < monthly_payment:
+        return 0
+    if monthly_payment <= 0:
+        return limit
+
+    if rate == 0:
+        months = math.floor((balance - monthly_payment) / monthly_payment) + 1
+    elif balance >= monthly_payment / rate:
+        # Payment never covers the interest; the balance only grows
+        months = limit
+    else:
+        shortfall = monthly_payment / rate - balance
+        months = math.floor(
+            math.log((monthly_payment / rate - monthly_payment) / shortfall) / math.log1p(rate)
+        ) + 1
+
+    months = min(months, limit)
+    while months > 0 and (
+        _balance_after(balance, rate, monthly_payment, months - 1) < monthly_payment
+        or _balance_after(balance, rate, monthly_payment, months) <= PAYOFF_THRESHOLD
+    ):
+        months -= 1
+    return months
+
+
+def simulate_events(loan_data, monthly_payment, max_months=MAX_MONTHS, start_month=0, max_interest=None):
+    """Simulate a snowball/avalanche payoff by jumping between payoff events.
+
+    While the first loan in priority order can absorb the entire monthly
+    budget nothing else is paid, so those months are skipped in one step
+    using the annuity formula. Only the few months around each payoff are
+    stepped explicitly, which makes the cost scale with the number of loans
+    rather than the number of months. With ``max_interest`` the run also
+    stops as soon as the interest charged exceeds it.
+
+    Returns a ``PayoffTimeline``.
+    """
+    ids, balances, rates = _load_arrays(loan_data)
+    timeline = PayoffTimeline(ids, rates, monthly_payment)
+    index = np.flatnonzero(balances > 0)
+    current_month = start_month
+
+    while index.size and current_month < max_months and (
+        max_interest is None or timeline.total_interest <= max_interest
+    ):
+        head_balance = float(balances[index[0]])
+        head_rate = float(rates[index[0]])
+        months = _months_absorbing_budget(
+            head_balance, head_rate, monthly_payment, max_months - current_month
+        )
+
+        if months > 1:
+            balance = balances[index]
+            timeline.segments.append((current_month + 1, months, index, balance.copy()))
+
+            # Loans behind the head receive nothing and simply compound
+            new_balance = balance * (1 + rates[index]) ** months
+            new_balance[0] = _balance_after(head_balance, head_rate, monthly_payment, months)
+
+            # Whatever the loans grew by beyond the payments made was interest
+            timeline.total_interest += float((new_balance - balance).sum()) + months * monthly_payment
+            balances[index] = new_balance
+            current_month += months
+            continue
+
+        current_month += 1
+        timeline.segments.append((current_month, 1, index, balances[index].copy()))
+        payment, interest, new_balance = _advance_month(balances[index], rates[index], monthly_payment)
+        balances[index] = new_balance
+        timeline.total_interest += float(interest.sum())
+        index = index[new_balance > PAYOFF_THRESHOLD]
+
+    timeline.payoff_months = current_month
+    timeline.remaining_loans = int(index.size)
+    return timeline
+
+
+def simulate_payoff_events(loan_data, monthly_payment, max_months=MAX_MONTHS, include_schedule=True,
+                           start_month=0):
+    """Run the event-driven simulator with the same return shape as ``simulate_payoff``."""
+    timeline = simulate_events(loan_data, monthly_payment, max_months=max_months, start_month=start_month)
+    schedule = list(timeline.iter_schedule()) if include_schedule else []
+    return schedule, timeline.total_interest, timeline.payoff_months, timeline.remaining_loans
+
+
+def sweep_payoff(loan_data, base_payment, extra_payments, max_months=MAX_MONTHS):
+    """Simulate many extra-payment scenarios over the same loans in one run.
+
+    Each scenario is a row of a ``(scenarios, loans)`` balance matrix and all
+    rows are advanced together month by month. Paid off loans are zeroed so
+    they drop out of the waterfall, and finished scenarios are dropped from
+    the matrix.
+
+    Returns ``(payoff_months, total_interest)`` arrays, one entry per scenario.
+    """
+    _, balances, rates = _load_arrays(loan_data)
+    budgets = base_payment + np.asarray(extra_payments, dtype=float)
+    balances = np.tile(np.where(balances > 0, balances, 0), (budgets.size, 1))
+
+    payoff_months = np.zeros(budgets.size, dtype=int)
+    total_interest = np.zeros(budgets.size)
+    rows = np.flatnonzero((balances > 0).any(axis=1))
+    balances, budgets = balances[rows], budgets[rows]
+    current_month = 0
+
+    while rows.size and current_month < max_months:
+        current_month += 1
+        paid_before = np.cumsum(balances, axis=1) - balances
+        payment = np.clip(budgets[:, None] - paid_before, 0, balances)
+        interest = balances * rates
+        balances = balances + interest - payment
+        balances[balances <= PAYOFF_THRESHOLD] = 0
+
+        total_interest[rows] += interest.sum(axis=1)
+        payoff_months[rows] = current_month
+
+        running = balances.any(axis=1)
+        if not running.all():
+            rows, balances, budgets = rows[running], balances[running], budgets[running]
+
+    return payoff_months, total_interest
+
+
+def stress_payoff(loan_data, monthly_payment, variable, rate_volatility, trials, max_months=MAX_MONTHS, seed=None):
+    """Simulate a payoff under many random interest-rate paths in one run.
+
+    Each trial is a row of a ``(trials, loans)`` balance matrix advanced like
+    ``sweep_payoff``. Loans flagged in ``variable`` follow a shared index rate
+    that takes a normal step every month, with ``rate_volatility`` the
+    standard deviation in APR percentage points per year; rates never go
+    below zero. Fixed-rate loans keep their rate in every trial.
+
+    Returns ``(payoff_months, total_interest)`` arrays, one entry per trial.
+    """
+    _, balances, rates = _load_arrays(loan_data)
+    variable = np.asarray(variable, dtype=bool)
+    rng = np.random.default_rng(seed)
+    monthly_step = rate_volatility / 100 / 12 / math.sqrt(12)
+
+    balances = np.tile(np.where(balances > 0, balances, 0), (trials, 1))
+    index_shift = np.zeros(trials)
+    payoff_months = np.zeros(trials, dtype=int)
+    total_interest = np.zeros(trials)
+    rows = np.flatnonzero((balances > 0).any(axis=1))
+    balances, index_shift = balances[rows], index_shift[rows]
+    current_month = 0
+
+    while rows.size and current_month < max_months:
+        current_month += 1
+        index_shift += rng.normal(0, monthly_step, rows.size)
+        month_rates = np.maximum(rates + np.outer(index_shift, variable), 0)
+
+        paid_before = np.cumsum(balances, axis=1) - balances
+        payment = np.clip(monthly_payment - paid_before, 0, balances)
+        interest = balances * month_rates
+        balances = balances + interest - payment
+        balances[balances <= PAYOFF_THRESHOLD] = 0
+
+        total_interest[rows] += interest.sum(axis=1)
+        payoff_months[rows] = current_month
+
+        running = balances.any(axis=1)
+        if not running.all():
+            rows, balances, index_shift = rows[running], balances[running], index_shift[running]
+
+    return payoff_months, total_interest
+
+
+def amortize(principal, monthly_rate, term_months, extra_payment=0):
+    """Build a consolidation loan schedule from the closed-form balance curve.
+
+    The balance after ``k`` level payments is
+    ``B(1+r)^k - P((1+r)^k - 1) / r``, so every month is computed at once as
+    an array. An extra payment shortens the loan; the last month pays off
+    whatever is left.
+
+    Returns ``(schedule, total_interest, monthly_payment)``.
+    """
+    if monthly_rate == 0:
+        monthly_payment = principal / term_months
+    else:
+        growth = (1 + monthly_rate) ** term_months
+        monthly_payment = principal * monthly_rate * growth / (growth - 1)
+    monthly_payment += extra_payment
+
+    months = np.arange(1, term_months + 1)
+    if monthly_rate == 0:
+        balance = principal - monthly_payment * months
+    else:
+        growth = (1 + monthly_rate) ** months
+        balance = principal * growth - monthly_payment * (growth - 1) / monthly_rate
+
+    # Stop at the first month the loan is paid off, or at the end of the term
+    paid_off = np.flatnonzero(balance <= PAYOFF_THRESHOLD)
+    months_paid = int(paid_off[0]) + 1 if paid_off.size else term_months
+    balance = balance[:months_paid]
+    opening = np.concatenate(([principal], balance[:-1]))
+
+    interest = opening * monthly_rate
+    principal_paid = monthly_payment - interest
+    principal_paid[-1] = opening[-1]
+    balance[-1] = 0
+
+    schedule = [
+        {
+            'month': month,
+            'payment': round(pay, 2),
+            'principal': round(prin, 2),
+            'interest': round(inte, 2),
+            'remaining_balance': round(bal, 2)
+        }
+        for month, pay, prin, inte, bal in zip(
+            months[:months_paid].tolist(),
+            (principal_paid + interest).tolist(),
+            principal_paid.tolist(),
+            interest.tolist(),
+            np.maximum(balance, 0).tolist(),
+        )
+    ]
+    return schedule, float(interest.sum()), monthly_payment
+
+
+def scan_consolidation(principal, annual_rates, terms, extra_payment=0):
+    """Score a consolidation loan for every rate and term pair at once.
+
+    Rates (APR in percent) run down the rows and terms across the columns.
+    Each cell is solved with the annuity formulas: the level payment, the
+    month the balance drops to a cent with any extra payment, and the
+    interest paid by then, matching ``amortize`` for that rate and term.
+
+    Returns ``(monthly_payment, total_interest, payoff_months)`` matrices.
+    """
+    rates = np.asarray(annual_rates, dtype=float)[:, None] / 100 / 12
+    terms = np.asarray(terms, dtype=float)[None, :]
+    fixed = rates == 0
+    safe_rates = np.where(fixed, 1, rates)
+
+    growth = (1 + safe_rates) ** terms
+    monthly_payment = np.where(
+        fixed, principal / terms, principal * safe_rates * growth / (growth - 1)
+    ) + extra_payment
+
+    # First month whose closing balance is within a cent of zero
+    with np.errstate(divide='ignore', invalid='ignore'):
+        months = np.where(
+            fixed,
+            np.ceil((principal - PAYOFF_THRESHOLD) / monthly_payment),
+            np.ceil(
+                np.log((monthly_payment - PAYOFF_THRESHOLD * safe_rates) / (monthly_payment - principal * safe_rates))
+                / np.log1p(safe_rates)
+            ),
+        )
+    months = np.clip(months, 1, terms)
+
+    # Everything paid beyond the principal is interest; the last payment clears the balance
+    before_last = months - 1
+    opening = np.where(
+        fixed,
+        principal - monthly_payment * before_last,
+        principal * (1 + safe_rates) ** before_last
+        - monthly_payment * ((1 + safe_rates) ** before_last - 1) / safe_rates,
+    )
+    total_interest = monthly_payment * before_last + opening * (1 + rates) - principal
+    return monthly_payment, total_interest, months.astype(int)
+
+
+def minimum_payment_baseline(loan_data, max_months=BASELINE_MAX_MONTHS):
+    """Simulate every loan paid separately at just its minimum payment.
+
+    This is what the debt would cost without any plan, so it is the baseline
+    consolidation savings are measured against. All loans are advanced
+    together as arrays until the last one is paid off, for at most
+    ``max_months``. A minimum that does not cover a loan's interest never
+    pays it off, so ``paid_off`` is False whenever any loan is still owed at
+    the horizon; the interest up to then is then no measure of savings.
+
+    Returns ``(total_interest, payoff_months, paid_off)``.
+    """
+    _, balances, rates = _load_arrays(loan_data)
+    minimums = np.array([loan['minimum_payment'] for loan in loan_data], dtype=float)
+    balances = np.where(balances > 0, balances, 0)
+
+    total_interest = 0.0
+    current_month = 0
+    while balances.any() and current_month < max_months:
+        current_month += 1
+        interest = balances * rates
+        balances = balances + interest - np.minimum(minimums, balances)
+        balances[balances <= PAYOFF_THRESHOLD] = 0
+        total_interest += float(interest.sum())
+
+    return total_interest, current_month, not balances.any()
+
+
+def solve_extra_payment(loan_data, base_payment, target_months=None, max_interest=None, max_evaluations=40):
+    """Find the smallest extra payment that meets a payoff month or interest budget.
+
+    Extra payments only ever bring the payoff forward and cut interest, so
+    the answer is bisected in whole cents between nothing and enough to clear
+    the debt at once. Each probe is an event-driven run that stops as soon as
+    it passes ``target_months`` or ``max_interest``.
+
+    Returns ``(extra_payment, evaluations)``, with ``extra_payment`` None when
+    even the upper bound misses the target.
+    """
+    max_months = min(target_months or MAX_MONTHS, MAX_MONTHS)
+    evaluations = 0
+
+    def meets_target(extra_cents):
+        nonlocal evaluations
+        evaluations += 1
+        timeline = simulate_events(
+            loan_data, base_payment + from_cents(extra_cents), max_months=max_months, max_interest=max_interest
+        )
+        return timeline.remaining_loans == 0 and (max_interest is None or timeline.total_interest <= max_interest)
+
+    if meets_target(0):
+        return 0.0, evaluations
+
+    high = to_cents(sum(loan['balance'] for loan in loan_data))
+    if not meets_target(high):
+        return None, evaluations
+
+    low = 0
+    while high - low > 1 and evaluations < max_evaluations:
+        middle = (low + high) // 2
+        if meets_target(middle):
+            high = middle
+        else:
+            low = middle
+    return from_cents(high), evaluations
+
+
+def _div_round(numerator, denominator):
+    """Divide integers, rounding half to even (banker's rounding)."""
+    quotient, remainder = divmod(numerator, denominator)
+    twice = 2 * remainder
+    if twice > denominator or (twice == denominator and quotient & 1):
+        quotient += 1
+    return quotient
+
+
+def _rate_units(monthly_rate):
+    """Convert a monthly rate to an exact integer number of ``RATE_SCALE`` units."""
+    return round(monthly_rate * RATE_SCALE)
+
+
+def simulate_payoff_cents(loan_data, monthly_payment, max_months=MAX_MONTHS, include_schedule=True,
+                          start_month=0):
+    """Simulate a snowball/avalanche payoff in integer cents.
+
+    Balances and payments are whole cents throughout and each month's
+    interest is rounded half to even, so totals are exact and reproducible
+    across platforms. A loan is paid off once it is down to a cent.
+
+    Returns ``(schedule, total_interest, months, remaining_loans)``.
+    """
+    budget = to_cents(monthly_payment)
+    active = [
+        [str(loan['id']), to_cents(loan['balance']), _rate_units(loan['monthly_interest_rate'])]
+        for loan in loan_data
+        if loan['balance'] > 0
+    ]
+
+    schedule = []
+    total_interest = 0
+    current_month = start_month
+
+    while active and current_month < max_months:
+        current_month += 1
+        available = budget
+        month_payment = 0
+        payments = {}
+        still_active = []
+
+        for loan in active:
+            loan_id, balance, rate = loan
+            payment = balance if available > balance else available
+            interest = _div_round(balance * rate, RATE_SCALE)
+            available -= payment
+            month_payment += payment
+            total_interest += interest
+            balance += interest - payment
+            loan[1] = balance
+
+            if include_schedule:
+                payments[loan_id] = {
+                    'payment': from_cents(payment),
+                    'interest': from_cents(interest),
+                    'balance': from_cents(balance)
+                }
+            if balance > PAYOFF_CENTS:
+                still_active.append(loan)
+
+        active = still_active
+        if include_schedule:
+            schedule.append({
+                'month': current_month,
+                'payments': payments,
+                'total_payment': from_cents(month_payment),
+                'remaining_balance': from_cents(sum(loan[1] for loan in active))
+            })
+
+    return schedule, from_cents(total_interest), current_month, len(active)
+
+
+def amortize_cents(principal, monthly_rate, term_months, extra_payment=0):
+    """Build a consolidation loan schedule in integer cents.
+
+    The level payment is the exact annuity payment rounded half to even to
+    the cent, plus any extra. Interest is rounded the same way each month and
+    the last payment clears whatever is left.
+
+    Returns ``(schedule, total_interest, monthly_payment)`` in dollars.
+    """
+    balance = to_cents(principal)
+    rate = _rate_units(monthly_rate)
+    if rate == 0:
+        payment = _div_round(balance, term_months)
+    else:
+        growth = Fraction(RATE_SCALE + rate, RATE_SCALE) ** term_months
+        payment = round(Fraction(balance * rate, RATE_SCALE) * growth / (growth - 1))
+    payment += to_cents(extra_payment)
+
+    schedule = []
+    total_interest = 0
+    for month in range(1, term_months + 1):
+        interest = _div_round(balance * rate, RATE_SCALE)
+        principal_paid = payment - interest
+        if principal_paid > balance or month == term_months:
+            principal_paid = balance
+        balance -= principal_paid
+        total_interest += interest
+
+        schedule.append({
+            'month': month,
+            'payment': from_cents(principal_paid + interest),
+            'principal': from_cents(principal_paid),
+            'interest': from_cents(interest),
+            'remaining_balance': from_cents(balance)
+        })
+        if balance == 0:
+            break
+
+    return schedule, from_cents(total_interest), from_cents(payment)
+
+
+ENGINES = {
+    'python': simulate_payoff_python,
+    'numpy': simulate_payoff,
+    'event': simulate_payoff_events,
+    'cents': simulate_payoff_cents,
+}
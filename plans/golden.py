@@ -0,0 +1,172 @@
+"""Golden-output checks for plan calculation engines.
+
+A set of randomized and edge-case portfolios is calculated once with the
+reference engine and saved as a fixture, inputs included. Any other engine
+can then be run over the same inputs and diffed against the fixture within
+a tolerance, reporting the first month and loan where the two diverge.
+"""
+
+import random
+import uuid
+from decimal import Decimal
+
+from loans.models import Loan
+from .benchmarks import PROFILES, synthetic_portfolio
+from .models import DebtPlan
+from .schedules import decode_plan_data
+
+REFERENCE_ENGINE = 'python'
+
+# Engines expected to reproduce the reference; ``cents`` rounds differently by design
+EQUIVALENT_ENGINES = ('numpy', 'event')
+
+# (name, method, extra payment, [(balance, rate, minimum), ...])
+EDGE_CASES = [
+    ('single-loan', 'avalanche', '0.00', [('5000.00', '18.00', '150.00')]),
+    ('interest-free', 'snowball', '25.00', [('1200.00', '0.00', '50.00'), ('800.00', '0.00', '40.00')]),
+    ('equal-balances', 'snowball', '100.00', [('2500.00', '12.00', '75.00')] * 3),
+    ('equal-rates', 'avalanche', '100.00', [('900.00', '19.99', '35.00'), ('4200.00', '19.99', '120.00')]),
+    ('balance-below-minimum', 'snowball', '0.00', [('20.00', '24.00', '35.00'), ('3000.00', '9.00', '90.00')]),
+    ('exact-payoff', 'avalanche', '0.00', [('100.00', '0.00', '100.00'), ('300.00', '0.00', '100.00')]),
+    ('minimum-below-interest', 'avalanche', '0.00', [('50000.00', '24.00', '100.00')]),
+    ('large-extra', 'snowball', '100000.00', [('15000.00', '6.50', '300.00'), ('700.00', '27.50', '25.00')]),
+]
+
+CONSOLIDATION_TERMS = (12, 60, 360)
+
+
+def _loan(rng, number, balance, rate, minimum):
+    return Loan(
+        id=uuid.UUID(int=rng.getrandbits(128)),
+        name=f'Loan {number + 1}',
+        balance=Decimal(balance),
+        interest_rate=Decimal(rate),
+        minimum_payment=Decimal(minimum)
+    )
+
+
+def golden_cases(count=30, seed=0):
+    """Build the portfolios to record, as JSON-ready case dicts.
+
+    Every edge case is included, followed by ``count`` randomized
+    portfolios of 1-50 loans cycling through the methods and benchmark
+    profiles.
+    """
+    rng = random.Random(seed)
+    cases = [
+        {
+            'name': name,
+            'method': method,
+            'extra_payment': extra_payment,
+            'loans': [
+                [str(loan.id), str(loan.balance), str(loan.interest_rate), str(loan.minimum_payment)]
+                for loan in (_loan(rng, number, *terms) for number, terms in enumerate(loans))
+            ],
+        }
+        for name, method, extra_payment, loans in EDGE_CASES
+    ]
+
+    methods = ('snowball', 'avalanche', 'consolidation')
+    for number in range(count):
+        method = methods[number % len(methods)]
+        profile = PROFILES[number % len(PROFILES)]
+        loans = synthetic_portfolio(rng.randint(1, 50), profile, seed=rng.getrandbits(32))
+        case = {
+            'name': f'random-{number + 1}-{profile}',
+            'method': method,
+            'extra_payment': str(rng.choice([Decimal('0.00'), Decimal('50.00'), Decimal('750.00')])),
+            'loans': [
+                [str(loan.id), str(loan.balance), str(loan.interest_rate), str(loan.minimum_payment)]
+                for loan in loans
+            ],
+        }
+        if method == 'consolidation':
+            case['consolidation_rate'] = f'{rng.uniform(3, 20):.2f}'
+            case['consolidation_term'] = rng.choice(CONSOLIDATION_TERMS)
+        cases.append(case)
+    return cases
+
+
+def calculate_case(case, engine=REFERENCE_ENGINE):
+    """Calculate a case's plan with an engine, returning plan data in the legacy layout."""
+    loans = [
+        Loan(
+            id=uuid.UUID(loan_id),
+            name=f'Loan {number + 1}',
+            balance=Decimal(balance),
+            interest_rate=Decimal(rate),
+            minimum_payment=Decimal(minimum)
+        )
+        for number, (loan_id, balance, rate, minimum) in enumerate(case['loans'])
+    ]
+    plan = DebtPlan(
+        name=case['name'],
+        method=case['method'],
+        extra_payment=Decimal(case['extra_payment']),
+        consolidation_rate=Decimal(case['consolidation_rate']) if 'consolidation_rate' in case else None,
+        consolidation_term=case.get('consolidation_term')
+    )
+    return decode_plan_data(plan.calculate_plan(engine=engine, loans=loans))
+
+
+def record_golden(cases, engine=REFERENCE_ENGINE):
+    """Calculate every case and attach its plan data as the expected output."""
+    return [dict(case, plan_data=calculate_case(case, engine=engine)) for case in cases]
+
+
+def _differs(expected, actual, tolerance):
+    if isinstance(expected, (int, float)) and isinstance(actual, (int, float)):
+        return abs(expected - actual) > tolerance + 1e-9
+    return expected != actual
+
+
+def first_divergence(expected, actual, tolerance=0.01, total_tolerance=0.01):
+    """Describe where two plan data dicts first diverge, or return None.
+
+    Amounts in schedule rows may differ by ``tolerance`` and the plan totals
+    by ``total_tolerance``; payoff months and the loans paid each month must
+    match exactly.
+    """
+    if expected['payoff_months'] != actual['payoff_months']:
+        return f"payoff_months: expected {expected['payoff_months']}, got {actual['payoff_months']}"
+    for field in ('total_debt', 'total_interest', 'monthly_payment'):
+        if _differs(expected[field], actual[field], total_tolerance):
+            return f'{field}: expected {expected[field]}, got {actual[field]}'
+
+    for expected_month, actual_month in zip(expected['schedule'], actual['schedule']):
+        month = expected_month['month']
+        if actual_month['month'] != month:
+            return f"month {month}: got month {actual_month['month']} instead"
+
+        expected_payments = expected_month.get('payments', {})
+        actual_payments = actual_month.get('payments', {})
+        if list(expected_payments) != list(actual_payments):
+            return f'month {month}: expected loans {list(expected_payments)}, got {list(actual_payments)}'
+        for loan_id, expected_entry in expected_payments.items():
+            for field, value in expected_entry.items():
+                if _differs(value, actual_payments[loan_id][field], tolerance):
+                    return (
+                        f'month {month} loan {loan_id} {field}: '
+                        f'expected {value}, got {actual_payments[loan_id][field]}'
+                    )
+
+        for field, value in expected_month.items():
+            if field not in ('month', 'payments') and _differs(value, actual_month.get(field), tolerance):
+                return f'month {month} {field}: expected {value}, got {actual_month.get(field)}'
+
+    if len(expected['schedule']) != len(actual['schedule']):
+        return f"schedule: expected {len(expected['schedule'])} months, got {len(actual['schedule'])}"
+    return None
+
+
+def diff_engine(golden, engine, tolerance=0.01, total_tolerance=0.01):
+    """Run an engine over recorded cases and return ``(case name, divergence)`` for each mismatch."""
+    mismatches = []
+    for case in golden:
+        divergence = first_divergence(
+            case['plan_data'], calculate_case(case, engine=engine),
+            tolerance=tolerance, total_tolerance=total_tolerance
+        )
+        if divergence is not None:
+            mismatches.append((case['name'], divergence))
+    return mismatches
@@ -0,0 +1,74 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from plans import benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Benchmark plan calculations on synthetic portfolios and compare them with a baseline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--baseline', default='plan_benchmarks.json',
+            help='Baseline file to compare against, or to write with --save.'
+        )
+        parser.add_argument(
+            '--save', action='store_true',
+            help='Write the results as the new baseline instead of comparing.'
+        )
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=list(benchmarks.SIZES),
+            help='Numbers of loans per portfolio (1 to 50).'
+        )
+        parser.add_argument(
+            '--engines', nargs='+', default=list(benchmarks.ENGINES),
+            help='Snowball/avalanche engines to benchmark.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Timed runs per case; the fastest is kept.'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.25,
+            help='Fractional slowdown or growth over the baseline reported as a regression.'
+        )
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help='Exit with an error when any regression is found.'
+        )
+
+    def handle(self, *args, **options):
+        if any(size < 1 or size > 50 for size in options['sizes']):
+            raise CommandError('Portfolio sizes must be between 1 and 50 loans.')
+
+        results = benchmarks.run_benchmarks(
+            sizes=options['sizes'], engines=options['engines'], repeat=options['repeat']
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['case']:<40} {result['seconds'] * 1000:9.2f} ms "
+                f"{result['peak_memory'] / 1024:9.1f} KiB {result['json_bytes']:>9} B "
+                f"{result['payoff_months']:>4} months"
+            )
+
+        baseline_path = Path(options['baseline'])
+        if options['save']:
+            baseline_path.write_text(json.dumps(results, indent=2))
+            self.stdout.write(self.style.SUCCESS(f'Saved {len(results)} case(s) to {baseline_path}.'))
+            return
+
+        if not baseline_path.exists():
+            self.stdout.write(f'No baseline at {baseline_path}; run with --save to create one.')
+            return
+
+        regressions = benchmarks.find_regressions(
+            results, json.loads(baseline_path.read_text()), threshold=options['threshold']
+        )
+        for regression in regressions:
+            self.stdout.write(self.style.WARNING(f'REGRESSION {regression}'))
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} regression(s) against {baseline_path}.')
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS(f'No regressions against {baseline_path}.'))
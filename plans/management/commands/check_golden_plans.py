@@ -0,0 +1,69 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from plans import golden
+
+
+class Command(BaseCommand):
+    help = 'Record reference plan outputs as golden fixtures, or diff an engine against them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fixture', default='golden_plans.json',
+            help='Golden fixture file to write with --record or compare against.'
+        )
+        parser.add_argument(
+            '--record', action='store_true',
+            help='Calculate the cases with the reference engine and write the fixture.'
+        )
+        parser.add_argument(
+            '--count', type=int, default=30,
+            help='Number of randomized portfolios to record alongside the edge cases.'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Seed for the randomized portfolios.'
+        )
+        parser.add_argument(
+            '--engine', nargs='+', default=list(golden.EQUIVALENT_ENGINES),
+            help='Engines to diff against the fixture.'
+        )
+        parser.add_argument(
+            '--tolerance-cents', type=int, default=1,
+            help='Allowed difference in cents for each amount in the schedule.'
+        )
+        parser.add_argument(
+            '--total-tolerance-cents', type=int, default=1,
+            help='Allowed difference in cents for plan totals such as total interest.'
+        )
+
+    def handle(self, *args, **options):
+        fixture = Path(options['fixture'])
+
+        if options['record']:
+            cases = golden.record_golden(golden.golden_cases(count=options['count'], seed=options['seed']))
+            fixture.write_text(json.dumps(cases))
+            self.stdout.write(self.style.SUCCESS(f'Recorded {len(cases)} case(s) to {fixture}.'))
+            return
+
+        if not fixture.exists():
+            raise CommandError(f'No golden fixture at {fixture}; run with --record to create one.')
+        cases = json.loads(fixture.read_text())
+
+        failed = 0
+        for engine in options['engine']:
+            mismatches = golden.diff_engine(
+                cases, engine,
+                tolerance=options['tolerance_cents'] / 100,
+                total_tolerance=options['total_tolerance_cents'] / 100
+            )
+            for name, divergence in mismatches:
+                self.stdout.write(self.style.WARNING(f'{engine} {name}: {divergence}'))
+            self.stdout.write(f'{engine}: {len(cases) - len(mismatches)}/{len(cases)} case(s) match.')
+            failed += len(mismatches)
+
+        if failed:
+            raise CommandError(f'{failed} case(s) diverge from {fixture}.')
+        self.stdout.write(self.style.SUCCESS('Every engine matches the golden outputs.'))
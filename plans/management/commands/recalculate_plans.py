@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from plans.bulk import recalculate_plans
+from plans.models import DebtPlan
+
+
+class Command(BaseCommand):
+    help = 'Recalculate the stored results of every active plan, in parallel worker processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Worker processes to calculate in (defaults to the CPU count; 0 calculates in this process).'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Plans read from the database and handed to a worker at a time.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Plans written per bulk update query.'
+        )
+        parser.add_argument(
+            '--after', default=None,
+            help='Resume after this plan id, as reported by an earlier run.'
+        )
+
+    def handle(self, *args, **options):
+        plans = DebtPlan.objects.filter(status='active').defer('plan_data')
+        if options['after']:
+            plans = plans.filter(pk__gt=options['after'])
+
+        started = time.perf_counter()
+        written = 0
+        for written, last_id in recalculate_plans(
+            plans, workers=options['workers'], chunk_size=options['chunk_size'], batch_size=options['batch_size']
+        ):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'{written} plan(s) in {elapsed:.1f}s ({written / elapsed:.1f}/s), last id {last_id}')
+
+        self.stdout.write(self.style.SUCCESS(f'Recalculated {written} plan(s).'))
@@ -0,0 +1,47 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from plans.models import PlanCalculationJob
+
+
+class Command(BaseCommand):
+    help = 'Run queued plan calculations, polling the database for new jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once the queue is empty instead of waiting for more jobs.'
+        )
+        parser.add_argument(
+            '--max-jobs', type=int, default=0,
+            help='Exit after running this many jobs (0 for no limit).'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Seconds to wait between polls while the queue is empty.'
+        )
+        parser.add_argument(
+            '--stale-after', type=float, default=PlanCalculationJob.STALE_AFTER.total_seconds(),
+            help='Seconds after which a running job is taken to belong to a dead worker and claimed again.'
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        while not options['max_jobs'] or processed < options['max_jobs']:
+            job = PlanCalculationJob.claim_next(stale_after=timedelta(seconds=options['stale_after']))
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            job.run()
+            processed += 1
+            self.stdout.write(
+                f"{job.id} {job.status} in {job.run_seconds}s "
+                f"(queued {job.queued_seconds}s)"
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} job(s).'))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-16 21:08
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlanCalculationJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('engine', models.CharField(choices=[('python', 'Reference Python engine'), ('numpy', 'Vectorized NumPy engine'), ('event', 'Event-driven simulator'), ('cents', 'Integer-cent fixed-point engine')], default='python', max_length=20)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('error', models.TextField(blank=True, help_text='Error message if the calculation failed')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='calculation_jobs', to='plans.debtplan')),
+            ],
+            options={
+                'verbose_name': 'Plan Calculation Job',
+                'verbose_name_plural': 'Plan Calculation Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='plans_planc_status_49d0dd_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0002_plancalculationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plancalculationjob',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Number of times a worker claimed the job'),
+        ),
+    ]
@@ -1,7 +1,24 @@
 from django.db import models
+from django.db.models import F, Q
 from django.contrib.auth.models import User
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator
 from loans.models import Loan
+from .cache import plan_cache, plan_inputs
+from .engines import (
+    DEFAULT_ENGINE, ENGINE_CHOICES, ENGINES, amortize, amortize_cents, scan_consolidation, simulate_portfolios,
+    solve_extra_payment, stress_payoff, sweep_payoff
+)
+from .schedules import (
+    checkpoint_balances, decode_schedule, encode_schedule, interest_through, is_columnar,
+    iter_schedule, schedule_length
+)
+from .timing import NULL_TIMER
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+import numpy as np
 import uuid
 import json
 
@@ -64,6 +81,8 @@ class DebtPlan(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    PREVIEW_MONTHS = 24
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Debt Plan'
@@ -86,217 +105,419 @@ class DebtPlan(models.Model):
             is_active=True
         ).order_by('balance' if self.method == 'snowball' else '-interest_rate')
 
-    def calculate_plan(self):
-        """Calculate the debt reduction plan based on the selected method."""
-        loans = list(self.loans)
+    @property
+    def schedule(self):
+        """Monthly schedule in the legacy layout, whichever format is stored."""
+        return decode_schedule((self.plan_data or {}).get('schedule'))
+
+    @property
+    def schedule_months(self):
+        """Number of months in the stored schedule, without decoding it."""
+        return schedule_length((self.plan_data or {}).get('schedule'))
+
+    @cached_property
+    def schedule_preview(self):
+        """First ``PREVIEW_MONTHS`` months of the schedule, decoding nothing beyond them."""
+        return self.schedule_slice(to_month=self.PREVIEW_MONTHS)
+
+    def schedule_slice(self, from_month=None, to_month=None, loan_ids=None):
+        """Months ``from_month``..``to_month`` of the schedule, optionally for some loans only."""
+        return list(iter_schedule(
+            (self.plan_data or {}).get('schedule'), from_month=from_month, to_month=to_month, loan_ids=loan_ids
+        ))
+
+    def calculate_plan(self, engine=DEFAULT_ENGINE, include_schedule=True, loans=None):
+        """Calculate the debt reduction plan based on the selected method.
+
+        With ``include_schedule=False`` the monthly schedule is left out of the
+        result; engines that build rows lazily then skip them entirely. Callers
+        that already fetched the plan's loans can pass them in as ``loans``.
+        """
+        loans = list(self.loans) if loans is None else loans
         if not loans:
             return self._empty_plan_data()
 
-        if self.method == 'snowball':
-            return self._calculate_snowball(loans)
-        elif self.method == 'avalanche':
-            return self._calculate_avalanche(loans)
+        if self.method in ('snowball', 'avalanche'):
+            plan_data = self._calculate_payoff(loans, engine=engine, include_schedule=include_schedule)
         elif self.method == 'consolidation':
-            return self._calculate_consolidation(loans)
+            plan_data = self._calculate_consolidation(loans, engine=engine)
         else:
             return self._empty_plan_data()
 
-    def _empty_plan_data(self):
-        """Return empty plan data structure."""
+        if not include_schedule:
+            plan_data['schedule'] = []
+        return plan_data
+
+    def run_calculation(self, engine=DEFAULT_ENGINE, timer=NULL_TIMER):
+        """Calculate the plan and store the results on it.
+
+        A stored plan is resumed from the present month where possible,
+        otherwise it is calculated in full, reusing any identical earlier
+        calculation. Pass a ``PhaseTimer`` as ``timer`` to record how long
+        each phase took.
+        """
+        with timer.phase('loans'):
+            loans = list(self.loans)
+
+        stored = self.plan_data
+        with timer.phase('simulate'):
+            plan_data = self.recalculate(engine=engine, loans=loans)
+            if plan_data is None:
+                plan_data = dict(
+                    plan_cache.calculate(self, engine=engine, loans=loans),
+                    calculated_at=timezone.localdate().isoformat(),
+                    inputs=plan_inputs(self, loans),
+                    engine=engine
+                )
+
+        self.set_plan_data(plan_data)
+
+        if timer.enabled:
+            # The JSONField encodes again on save; this isolates that cost
+            with timer.phase('encode'):
+                timer.count('plan_data_bytes', len(json.dumps(plan_data, cls=DjangoJSONEncoder)))
+            timer.count('loan_count', len(loans))
+            if plan_data is stored:
+                # Returned unchanged, so nothing was simulated this time
+                months = 0
+            else:
+                months = plan_data['payoff_months'] - plan_data['summary'].get('resumed_from_month', 0)
+            timer.count('months', months)
+
+        with timer.phase('save'):
+            self.save()
+
+    def set_plan_data(self, plan_data):
+        """Store calculated plan data and its headline figures on the plan, without saving."""
+        self.total_debt = plan_data['total_debt']
+        self.total_interest_saved = plan_data.get('total_interest', 0)
+        self.payoff_months = plan_data['payoff_months']
+        self.total_payments = plan_data.get('monthly_payment', 0) * plan_data['payoff_months']
+        self.plan_data = plan_data
+        self.status = 'active'
+
+    def recalculate(self, engine=DEFAULT_ENGINE, loans=None, today=None):
+        """Recalculate a stored snowball/avalanche plan from the present month.
+
+        Months up to the present have already happened, so they are kept from
+        the stored schedule, whose per-loan balance columns serve as month-end
+        checkpoints. The simulation resumes from the balances at the end of the
+        last elapsed month, with changed loans entering at their current
+        balance, rate and minimum payment. Returns the stored plan data as is
+        when nothing changed and it was calculated with ``engine``, or None
+        when there is nothing to resume from and a full calculation is needed.
+        """
+        plan_data = self.plan_data or {}
+        schedule = plan_data.get('schedule')
+        inputs = plan_data.get('inputs')
+        if (self.method == 'consolidation' or not inputs or not plan_data.get('calculated_at')
+                or not is_columnar(schedule) or schedule['layout'] != 'loans'):
+            return None
+
+        loans = list(self.loans) if loans is None else loans
+        current_inputs = plan_inputs(self, loans)
+        if current_inputs == inputs:
+            return plan_data if plan_data.get('engine') == engine else None
+        if current_inputs['method'] != inputs['method'] or not loans:
+            return None
+
+        calculated_at = date.fromisoformat(plan_data['calculated_at'])
+        today = today or timezone.localdate()
+        elapsed = (today.year - calculated_at.year) * 12 + today.month - calculated_at.month
+        resume_month = min(elapsed, schedule['start_month'] + schedule['months'] - 1)
+        if resume_month < schedule['start_month']:
+            return None
+
+        # Unchanged loans continue from their checkpoint; paid off ones drop out
+        checkpoint = checkpoint_balances(schedule, resume_month)
+        previous_loans = inputs['loans']
+        loan_data = []
+        for loan in self._ordered_loan_data(loans):
+            loan_id = str(loan['id'])
+            previous = previous_loans.get(loan_id)
+            if previous is not None and previous[0] == current_inputs['loans'][loan_id][0]:
+                if loan_id not in checkpoint:
+                    continue
+                loan['balance'] = checkpoint[loan_id]
+            loan_data.append(loan)
+
+        monthly_payment = sum(float(loan.minimum_payment) for loan in loans) + float(self.extra_payment)
+        simulate = ENGINES[engine]
+        suffix, suffix_interest, payoff_months, remaining = simulate(
+            loan_data, monthly_payment, start_month=resume_month
+        )
+        if not loan_data:
+            payoff_months = resume_month
+
+        # As in a full calculation, the debt is what the current loans were entered at
+        total_debt = sum(float(loan.balance) for loan in loans)
+        total_interest = interest_through(schedule, resume_month) + suffix_interest
         return {
-            'total_debt': 0,
-            'total_interest': 0,
-            'payoff_months': 0,
-            'monthly_payment': 0,
-            'schedule': [],
-            'summary': {}
+            'total_debt': round(total_debt, 2),
+            'total_interest': round(total_interest, 2),
+            'payoff_months': payoff_months,
+            'monthly_payment': round(monthly_payment, 2),
+            'schedule': encode_schedule(list(iter_schedule(schedule, to_month=resume_month)) + suffix),
+            'summary': {
+                'method': self.method,
+                'loans_paid_off': len(loans) - remaining,
+                'remaining_loans': remaining,
+                'total_payments': round(total_debt + total_interest, 2),
+                'resumed_from_month': resume_month
+            },
+            'calculated_at': plan_data['calculated_at'],
+            'inputs': current_inputs,
+            'engine': engine,
         }
 
-    def _calculate_snowball(self, loans):
-        """Calculate Debt Snowball plan (pay smallest balances first)."""
-        # Create working copies to avoid modifying original loan objects
-        loan_data = []
-        for loan in loans:
-            loan_data.append({
-                'id': loan.id,
-                'balance': float(loan.balance),
-                'minimum_payment': float(loan.minimum_payment),
-                'monthly_interest_rate': float(loan.monthly_interest_rate),
-                'name': loan.name
-            })
+    @classmethod
+    def active_loans_by_user(cls, plans):
+        """Fetch the active loans of every plan's user in one query, keyed by user id."""
+        loans_by_user = {}
+        for loan in Loan.objects.filter(user_id__in={plan.user_id for plan in plans}, is_active=True):
+            loans_by_user.setdefault(loan.user_id, []).append(loan)
+        return loans_by_user
+
+    @classmethod
+    def calculate_many(cls, plans, include_schedule=True, batch_size=500, loans_by_user=None):
+        """Calculate many plans at once, as ``calculate_plan`` would for each.
+
+        The active loans of every plan's user are fetched in one query, unless
+        already fetched with ``active_loans_by_user`` and passed in. Snowball
+        and avalanche plans are then simulated together in batches of
+        ``batch_size`` by the multi-portfolio engine; consolidation plans are
+        calculated one by one. Returns plan data in the order of ``plans``.
+        """
+        plans = list(plans)
+        if loans_by_user is None:
+            loans_by_user = cls.active_loans_by_user(plans)
+
+        results = [None] * len(plans)
+        payoff_plans = []
+        for position, plan in enumerate(plans):
+            loans = loans_by_user.get(plan.user_id, [])
+            if plan.method in ('snowball', 'avalanche') and loans:
+                payoff_plans.append((position, plan, loans))
+            else:
+                results[position] = plan.calculate_plan(include_schedule=include_schedule, loans=loans)
+
+        for start in range(0, len(payoff_plans), batch_size):
+            batch = payoff_plans[start:start + batch_size]
+            portfolios = [plan._ordered_loan_data(loans) for _, plan, loans in batch]
+            budgets = [plan._payoff_budget(loan_data) for (_, plan, _), loan_data in zip(batch, portfolios)]
+            simulated = simulate_portfolios(portfolios, budgets, include_schedule=include_schedule)
+            for (position, plan, loans), loan_data, monthly_payment, result in zip(
+                batch, portfolios, budgets, simulated
+            ):
+                results[position] = plan._payoff_plan_data(loans, loan_data, monthly_payment, result)
+        return results
+
+    @classmethod
+    def compare_methods(cls, user, extra_payment=0, consolidation_rate=None, consolidation_term=None,
+                        engine='event', parallel=False, loans=None):
+        """Calculate every method for a user's loans from a single loan fetch.
+
+        Consolidation is only included when a rate and term are given. The
+        loan list is shared by all strategies and only totals are calculated;
+        with ``parallel=True`` the strategies run on a thread pool. Returns
+        ``(plan, plan_data)`` pairs for unsaved plans.
+        """
+        if loans is None:
+            loans = list(Loan.objects.filter(user=user, is_active=True))
+
+        plans = [
+            cls(user=user, name='Debt Snowball', method='snowball', extra_payment=extra_payment),
+            cls(user=user, name='Debt Avalanche', method='avalanche', extra_payment=extra_payment),
+        ]
+        if consolidation_rate is not None and consolidation_term:
+            plans.append(cls(
+                user=user,
+                name='Debt Consolidation',
+                method='consolidation',
+                extra_payment=extra_payment,
+                consolidation_rate=consolidation_rate,
+                consolidation_term=consolidation_term
+            ))
+
+        def calculate(plan):
+            return plan, plan.calculate_plan(engine=engine, include_schedule=False, loans=loans)
+
+        if parallel:
+            with ThreadPoolExecutor(max_workers=len(plans)) as pool:
+                return list(pool.map(calculate, plans))
+        return [calculate(plan) for plan in plans]
+
+    @classmethod
+    def scan_consolidation_offers(cls, user, rates, terms, extra_payment=0, loans=None):
+        """Score consolidating a user's loans at every rate and term combination.
+
+        The whole grid is computed in one vectorized pass, with rates as rows
+        and terms as columns, and compared against the cached minimum-payment
+        baseline for the loans.
+        """
+        if loans is None:
+            loans = list(Loan.objects.filter(user=user, is_active=True))
 
-        # Sort by balance ascending (smallest first)
-        loan_data.sort(key=lambda x: x['balance'])
+        total_debt = sum(float(loan.balance) for loan in loans)
+        baseline_interest, baseline_months, baseline_paid_off = plan_cache.baseline(loans)
+        monthly_payment, total_interest, payoff_months = scan_consolidation(
+            total_debt, [float(rate) for rate in rates], terms, float(extra_payment)
+        )
+        if baseline_paid_off:
+            interest_saved = np.maximum(baseline_interest - total_interest, 0).round(2).tolist()
+        else:
+            # Minimum payments never clear the debt, so there is no saving to measure
+            interest_saved = [[None] * len(terms) for _ in rates]
 
-        total_debt = sum(loan['balance'] for loan in loan_data)
-        total_interest = 0
-        monthly_payment = sum(loan['minimum_payment'] for loan in loan_data) + float(self.extra_payment)
+        return {
+            'total_debt': round(total_debt, 2),
+            'rates': [float(rate) for rate in rates],
+            'terms': list(terms),
+            'baseline': {
+                'total_interest': round(baseline_interest, 2),
+                'payoff_months': baseline_months,
+                'paid_off': baseline_paid_off
+            },
+            'monthly_payment': monthly_payment.round(2).tolist(),
+            'total_interest': total_interest.round(2).tolist(),
+            'payoff_months': payoff_months.tolist(),
+            'interest_saved': interest_saved,
+        }
 
-        schedule = []
-        current_month = 0
-        remaining_loans = loan_data.copy()
-
-        while remaining_loans and current_month < 600:  # Max 50 years
-            current_month += 1
-            month_data = {
-                'month': current_month,
-                'payments': {},
-                'total_payment': 0,
-                'remaining_balance': 0
+    def sweep_extra_payments(self, extra_payments, loans=None):
+        """Calculate payoff months and total interest for many extra payments at once.
+
+        Every amount is simulated in a single vectorized run over the same
+        loans, using this plan's snowball or avalanche ordering.
+        """
+        loans = list(self.loans) if loans is None else loans
+        loan_data = self._ordered_loan_data(loans)
+        base_payment = sum(loan['minimum_payment'] for loan in loan_data)
+        extra_payments = [float(extra) for extra in extra_payments]
+
+        payoff_months, total_interest = sweep_payoff(loan_data, base_payment, extra_payments)
+        return [
+            {
+                'extra_payment': extra,
+                'payoff_months': months,
+                'total_interest': round(interest, 2)
             }
+            for extra, months, interest in zip(extra_payments, payoff_months.tolist(), total_interest.tolist())
+        ]
+
+    def required_extra_payment(self, target_months=None, max_interest=None, loans=None):
+        """Find the smallest extra payment that meets a payoff month or interest budget.
+
+        Uses this plan's snowball or avalanche ordering. Returns the extra
+        payment with the totals it achieves, or ``extra_payment`` None when
+        the target cannot be met.
+        """
+        loans = list(self.loans) if loans is None else loans
+        loan_data = self._ordered_loan_data(loans)
+        base_payment = sum(loan['minimum_payment'] for loan in loan_data)
+
+        extra_payment, evaluations = solve_extra_payment(
+            loan_data, base_payment, target_months=target_months,
+            max_interest=None if max_interest is None else float(max_interest)
+        )
+        result = {'extra_payment': extra_payment, 'evaluations': evaluations}
+        if extra_payment is not None:
+            _, total_interest, payoff_months, _ = ENGINES['event'](
+                loan_data, base_payment + extra_payment, include_schedule=False
+            )
+            result.update({
+                'monthly_payment': round(base_payment + extra_payment, 2),
+                'payoff_months': payoff_months,
+                'total_interest': round(total_interest, 2)
+            })
+        return result
+
+    def stress_test(self, trials, rate_volatility, seed=None, loans=None):
+        """Calculate payoff month and total interest bands under random rate paths.
+
+        Variable-rate loans share a random index rate in each trial and all
+        trials are simulated in a single vectorized run, using this plan's
+        snowball or avalanche ordering. Returns the 10th, 50th and 90th
+        percentiles along with the fixed-rate result for comparison.
+        """
+        loans = list(self.loans) if loans is None else loans
+        loan_data = self._ordered_loan_data(loans)
+        variable_ids = {loan.id for loan in loans if loan.has_variable_rate}
+        variable = [loan['id'] in variable_ids for loan in loan_data]
+        monthly_payment = sum(loan['minimum_payment'] for loan in loan_data) + float(self.extra_payment)
 
-            # Calculate payments for this month
-            available_payment = monthly_payment
-
-            # Process loans in snowball order (smallest balance first)
-            for loan in remaining_loans[:]:
-                balance = loan['balance']
-
-                if balance <= 0:
-                    remaining_loans.remove(loan)
-                    continue
-
-                # Calculate minimum payment for this loan
-                min_payment = loan['minimum_payment']
-
-                # Pay minimum payment first
-                payment = min(min_payment, balance)
-
-                # Apply any remaining payment as extra towards this loan
-                if available_payment > payment:
-                    extra_available = available_payment - payment
-                    extra_to_loan = min(extra_available, balance - payment)
-                    payment += extra_to_loan
-                    available_payment -= payment
-                else:
-                    # Not enough for minimum, pay what's available
-                    payment = min(available_payment, balance)
-                    available_payment = 0
-
-                # Calculate interest for this month
-                monthly_rate = loan['monthly_interest_rate']
-                interest = balance * monthly_rate
-                total_interest += interest
-
-                # Update balance: add interest, subtract payment
-                loan['balance'] = balance + interest - payment
-
-                month_data['payments'][str(loan['id'])] = {
-                    'payment': round(payment, 2),
-                    'interest': round(interest, 2),
-                    'balance': round(max(0, loan['balance']), 2)
-                }
-                month_data['total_payment'] += payment
-
-                # Remove loan if paid off
-                if loan['balance'] <= 0.01:  # Account for floating point precision
-                    remaining_loans.remove(loan)
-
-            month_data['remaining_balance'] = round(sum(loan['balance'] for loan in remaining_loans), 2)
-            schedule.append(month_data)
-
-            if not remaining_loans:
-                break
-
+        payoff_months, total_interest = stress_payoff(
+            loan_data, monthly_payment, variable, float(rate_volatility), trials, seed=seed
+        )
+        fixed_months, fixed_interest = sweep_payoff(loan_data, monthly_payment, [0])
         return {
-            'total_debt': round(total_debt, 2),
-            'total_interest': round(total_interest, 2),
-            'payoff_months': current_month,
-            'monthly_payment': round(monthly_payment, 2),
-            'schedule': schedule,
-            'summary': {
-                'method': 'snowball',
-                'loans_paid_off': len(loans) - len(remaining_loans),
-                'remaining_loans': len(remaining_loans),
-                'total_payments': round(total_debt + total_interest, 2)
-            }
+            'trials': trials,
+            'variable_loans': len(variable_ids),
+            'fixed_rate': {
+                'payoff_months': int(fixed_months[0]),
+                'total_interest': round(float(fixed_interest[0]), 2)
+            },
+            'payoff_months': self._percentile_bands(payoff_months),
+            'total_interest': self._percentile_bands(total_interest, ndigits=2),
         }
 
-    def _calculate_avalanche(self, loans):
-        """Calculate Debt Avalanche plan (pay highest interest first)."""
-        # Create working copies to avoid modifying original loan objects
-        loan_data = []
-        for loan in loans:
-            loan_data.append({
+    @staticmethod
+    def _percentile_bands(values, ndigits=None):
+        """Summarise trial results as their 10th, 50th and 90th percentiles."""
+        bands = np.percentile(values, [10, 50, 90]).tolist()
+        return {f'p{q}': round(value, ndigits) for q, value in zip((10, 50, 90), bands)}
+
+    def _ordered_loan_data(self, loans):
+        """Build working loan dicts in this plan's payoff priority order."""
+        loan_data = [
+            {
                 'id': loan.id,
                 'balance': float(loan.balance),
                 'minimum_payment': float(loan.minimum_payment),
                 'monthly_interest_rate': float(loan.monthly_interest_rate),
                 'name': loan.name
-            })
-
-        # Sort by interest rate descending (highest first)
-        loan_data.sort(key=lambda x: x['monthly_interest_rate'], reverse=True)
-
-        total_debt = sum(loan['balance'] for loan in loan_data)
-        total_interest = 0
-        monthly_payment = sum(loan['minimum_payment'] for loan in loan_data) + float(self.extra_payment)
-
-        schedule = []
-        current_month = 0
-        remaining_loans = loan_data.copy()
-
-        while remaining_loans and current_month < 600:  # Max 50 years
-            current_month += 1
-            month_data = {
-                'month': current_month,
-                'payments': {},
-                'total_payment': 0,
-                'remaining_balance': 0
             }
+            for loan in loans
+        ]
+        if self.method == 'snowball':
+            loan_data.sort(key=lambda x: x['balance'])
+        else:
+            loan_data.sort(key=lambda x: x['monthly_interest_rate'], reverse=True)
+        return loan_data
 
-            # Calculate payments for this month
-            available_payment = monthly_payment
-
-            # Process loans in avalanche order (highest interest first)
-            for loan in remaining_loans[:]:
-                balance = loan['balance']
-
-                if balance <= 0:
-                    remaining_loans.remove(loan)
-                    continue
-
-                # Calculate minimum payment for this loan
-                min_payment = loan['minimum_payment']
-
-                # Pay minimum payment first
-                payment = min(min_payment, balance)
-
-                # Apply any remaining payment as extra towards this loan
-                if available_payment > payment:
-                    extra_available = available_payment - payment
-                    extra_to_loan = min(extra_available, balance - payment)
-                    payment += extra_to_loan
-                    available_payment -= payment
-                else:
-                    # Not enough for minimum, pay what's available
-                    payment = min(available_payment, balance)
-                    available_payment = 0
-
-                # Calculate interest for this month
-                monthly_rate = loan['monthly_interest_rate']
-                interest = balance * monthly_rate
-                total_interest += interest
-
-                # Update balance: add interest, subtract payment
-                loan['balance'] = balance + interest - payment
-
-                month_data['payments'][str(loan['id'])] = {
-                    'payment': round(payment, 2),
-                    'interest': round(interest, 2),
-                    'balance': round(max(0, loan['balance']), 2)
-                }
-                month_data['total_payment'] += payment
-
-                # Remove loan if paid off
-                if loan['balance'] <= 0.01:  # Account for floating point precision
-                    remaining_loans.remove(loan)
-
-            month_data['remaining_balance'] = round(sum(loan['balance'] for loan in remaining_loans), 2)
-            schedule.append(month_data)
+    def _empty_plan_data(self):
+        """Return empty plan data structure."""
+        return {
+            'total_debt': 0,
+            'total_interest': 0,
+            'payoff_months': 0,
+            'monthly_payment': 0,
+            'schedule': [],
+            'summary': {}
+        }
 
-            if not remaining_loans:
-                break
+    def _calculate_payoff(self, loans, engine=DEFAULT_ENGINE, include_schedule=True):
+        """Calculate a Debt Snowball or Debt Avalanche plan.
+
+        Both strategies pour the same monthly budget into the loans and only
+        differ in priority order: snowball pays the smallest balances first,
+        avalanche the highest interest rates.
+        """
+        loan_data = self._ordered_loan_data(loans)
+        monthly_payment = self._payoff_budget(loan_data)
+        return self._payoff_plan_data(
+            loans, loan_data, monthly_payment,
+            ENGINES[engine](loan_data, monthly_payment, include_schedule=include_schedule)
+        )
+
+    def _payoff_budget(self, loan_data):
+        """Total paid each month: every minimum plus the extra payment."""
+        return sum(loan['minimum_payment'] for loan in loan_data) + float(self.extra_payment)
+
+    def _payoff_plan_data(self, loans, loan_data, monthly_payment, result):
+        """Build snowball/avalanche plan data from an engine's result tuple."""
+        schedule, total_interest, current_month, remaining = result
+        total_debt = sum(loan['balance'] for loan in loan_data)
 
         return {
             'total_debt': round(total_debt, 2),
@@ -305,93 +526,48 @@ class DebtPlan(models.Model):
             'monthly_payment': round(monthly_payment, 2),
             'schedule': schedule,
             'summary': {
-                'method': 'avalanche',
-                'loans_paid_off': len(loans) - len(remaining_loans),
-                'remaining_loans': len(remaining_loans),
+                'method': self.method,
+                'loans_paid_off': len(loans) - remaining,
+                'remaining_loans': remaining,
                 'total_payments': round(total_debt + total_interest, 2)
             }
         }
 
-    def _calculate_consolidation(self, loans):
-        """Calculate Debt Consolidation plan."""
-        if not self.consolidation_rate or not self.consolidation_term:
+    def _calculate_consolidation(self, loans, engine=DEFAULT_ENGINE):
+        """Calculate Debt Consolidation plan.
+
+        The consolidated loan is amortized in closed form, or in integer
+        cents with the ``cents`` engine. Interest saved is measured against
+        paying each existing loan at its minimum, which is cached per loan set.
+        """
+        if self.consolidation_rate is None or not self.consolidation_term:
             return self._empty_plan_data()
 
         total_debt = sum(float(loan.balance) for loan in loans)
         consolidation_rate = float(self.consolidation_rate) / 100 / 12  # Monthly rate
-        term_months = self.consolidation_term
-
-        # Calculate consolidated payment using loan amortization formula
-        if consolidation_rate == 0:
-            monthly_payment = total_debt / term_months
-        else:
-            monthly_payment = total_debt * (consolidation_rate * (1 + consolidation_rate) ** term_months) / ((1 + consolidation_rate) ** term_months - 1)
+        amortize_schedule = amortize_cents if engine == 'cents' else amortize
+        schedule, total_interest, monthly_payment = amortize_schedule(
+            total_debt, consolidation_rate, self.consolidation_term, float(self.extra_payment)
+        )
+        payoff_months = len(schedule)
 
-        monthly_payment += float(self.extra_payment)
-
-        # Calculate total interest for consolidation
-        total_payments = monthly_payment * term_months
-        total_interest = total_payments - total_debt
-
-        # Calculate what interest would be without consolidation (more accurate calculation)
-        original_interest = 0
-        for loan in loans:
-            balance = float(loan.balance)
-            monthly_rate = float(loan.monthly_interest_rate)
-            min_payment = float(loan.minimum_payment)
-
-            # Estimate payoff months for each loan individually using proper amortization
-            if monthly_rate == 0:
-                estimated_months = balance / min_payment
-            else:
-                # Use loan amortization formula for each loan
-                # PMT = P * (r(1+r)^n) / ((1+r)^n - 1)
-                # Solve for n: n = log(PMT / (PMT - P*r)) / log(1+r)
-                if min_payment > balance * monthly_rate:
-                    estimated_months = - (1 / monthly_rate) * (1 - (balance * monthly_rate) / min_payment)
-                else:
-                    estimated_months = balance / min_payment
-
-            # Cap at reasonable maximum (30 years)
-            estimated_months = min(estimated_months, 360)
-            original_interest += balance * monthly_rate * estimated_months
-
-        interest_saved = max(0, original_interest - total_interest)
-
-        schedule = []
-        remaining_balance = total_debt
-
-        for month in range(1, term_months + 1):
-            interest = remaining_balance * consolidation_rate
-            principal = monthly_payment - interest
-
-            if principal > remaining_balance:
-                principal = remaining_balance
-                monthly_payment = principal + interest
-
-            remaining_balance -= principal
-
-            schedule.append({
-                'month': month,
-                'payment': round(monthly_payment, 2),
-                'principal': round(principal, 2),
-                'interest': round(interest, 2),
-                'remaining_balance': round(max(0, remaining_balance), 2)
-            })
-
-            if remaining_balance <= 0.01:  # Account for floating point precision
-                break
+        # Compare against keeping the loans and paying only their minimums
+        baseline_interest, baseline_months, baseline_paid_off = plan_cache.baseline(loans)
+        interest_saved = round(max(0, baseline_interest - total_interest), 2) if baseline_paid_off else None
 
         return {
             'total_debt': round(total_debt, 2),
             'total_interest': round(total_interest, 2),
-            'payoff_months': term_months,
+            'payoff_months': payoff_months,
             'monthly_payment': round(monthly_payment, 2),
             'schedule': schedule,
             'summary': {
                 'method': 'consolidation',
                 'consolidation_rate': float(self.consolidation_rate),
-                'interest_saved': round(interest_saved, 2),
+                'interest_saved': interest_saved,
+                'baseline_interest': round(baseline_interest, 2),
+                'baseline_months': baseline_months,
+                'baseline_paid_off': baseline_paid_off,
                 'loans_consolidated': len(loans),
                 'total_payments': round(total_debt + total_interest, 2)
             }
@@ -421,3 +597,88 @@ class PlanProgress(models.Model):
 
     def __str__(self):
         return f"{self.plan.name} - Month {self.month}"
+
+
+class PlanCalculationJob(models.Model):
+    """A queued plan calculation, run by the ``run_plan_worker`` command."""
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    plan = models.ForeignKey(DebtPlan, on_delete=models.CASCADE, related_name='calculation_jobs')
+    engine = models.CharField(max_length=20, choices=ENGINE_CHOICES, default=DEFAULT_ENGINE)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    error = models.TextField(blank=True, help_text="Error message if the calculation failed")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0, help_text="Number of times a worker claimed the job")
+
+    # A running job not finished by then is taken to belong to a dead worker
+    STALE_AFTER = timedelta(minutes=10)
+    MAX_ATTEMPTS = 3
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'created_at'])]
+        verbose_name = 'Plan Calculation Job'
+        verbose_name_plural = 'Plan Calculation Jobs'
+
+    def __str__(self):
+        return f"{self.plan.name} - {self.get_status_display()}"
+
+    @property
+    def queued_seconds(self):
+        """Seconds the job waited before a worker picked it up."""
+        if not self.started_at:
+            return None
+        return round((self.started_at - self.created_at).total_seconds(), 3)
+
+    @property
+    def run_seconds(self):
+        """Seconds the calculation took to run."""
+        if not self.started_at or not self.finished_at:
+            return None
+        return round((self.finished_at - self.started_at).total_seconds(), 3)
+
+    @classmethod
+    def claim_next(cls, stale_after=None):
+        """Claim the oldest queued job for this worker, or return None.
+
+        The status is flipped with a conditional update, so two workers
+        polling the same table never run the same job. A job left running
+        for longer than ``stale_after`` (``STALE_AFTER`` by default) was
+        claimed by a worker that died, so it is claimed again; after
+        ``MAX_ATTEMPTS`` claims it is marked failed instead.
+        """
+        now = timezone.now()
+        stale = Q(status='running', started_at__lt=now - (stale_after or cls.STALE_AFTER))
+        cls.objects.filter(stale, attempts__gte=cls.MAX_ATTEMPTS).update(
+            status='failed', error='The worker running this job stopped before it finished.', finished_at=now
+        )
+
+        claimable = Q(status='queued') | stale
+        for job_id in cls.objects.filter(claimable).order_by('created_at').values_list('id', flat=True)[:10]:
+            claimed = cls.objects.filter(claimable, pk=job_id).update(
+                status='running', started_at=now, attempts=F('attempts') + 1
+            )
+            if claimed:
+                return cls.objects.select_related('plan').get(pk=job_id)
+        return None
+
+    def run(self):
+        """Run the calculation and record the outcome."""
+        try:
+            self.plan.run_calculation(engine=self.engine)
+        except Exception as e:
+            self.status = 'failed'
+            self.error = str(e)
+        else:
+            self.status = 'done'
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'error', 'finished_at'])
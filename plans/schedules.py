@@ -0,0 +1,272 @@
+"""Storage formats for the monthly schedule kept in ``DebtPlan.plan_data``.
+
+Version 1 is the original layout: a list with one dict per month, each
+holding a ``payments`` dict keyed by loan id. Version 2 is columnar: a loan id
+header plus one array per loan for each of payment, interest and balance,
+with every amount stored as integer cents. A loan appears in consecutive
+months starting at its ``first_month``, so its column length is the number of
+months it was paid. A loan that drops out and is paid again later, such as a
+paid off loan whose balance was raised, starts another column under the same
+id. Consolidation plans have a single loan and store their columns directly.
+"""
+
+import json
+
+SCHEDULE_FORMAT = 'columnar'
+SCHEDULE_VERSION = 2
+
+LOAN_FIELDS = ('payment', 'interest', 'balance')
+CONSOLIDATED_FIELDS = ('payment', 'principal', 'interest', 'remaining_balance')
+
+
+def to_cents(amount):
+    """Convert a dollar amount to integer cents."""
+    return round(amount * 100)
+
+
+def from_cents(cents):
+    """Convert integer cents back to a dollar amount."""
+    return cents / 100
+
+
+def is_columnar(schedule):
+    """Return True if the schedule is stored in the columnar format."""
+    return isinstance(schedule, dict) and schedule.get('format') == SCHEDULE_FORMAT
+
+
+def encode_schedule(schedule):
+    """Encode a legacy schedule list into the columnar format."""
+    if is_columnar(schedule) or not schedule:
+        return schedule
+
+    if 'payments' not in schedule[0]:
+        encoded = _header('consolidated', schedule)
+        for field in CONSOLIDATED_FIELDS:
+            encoded[field] = [to_cents(month_data[field]) for month_data in schedule]
+        return encoded
+
+    encoded = _header('loans', schedule)
+    encoded.update({
+        'total_payment': [to_cents(month_data['total_payment']) for month_data in schedule],
+        'remaining_balance': [to_cents(month_data['remaining_balance']) for month_data in schedule],
+        'loan_ids': [],
+        'first_month': [],
+        'payment': [],
+        'interest': [],
+        'balance': [],
+    })
+
+    columns = {}
+    for month_data in schedule:
+        month = month_data['month']
+        for loan_id, entry in month_data['payments'].items():
+            column = columns.get(loan_id)
+            if column is None or encoded['first_month'][column] + len(encoded['payment'][column]) != month:
+                # Columns only hold consecutive months, so a gap starts a new one
+                column = columns[loan_id] = len(encoded['loan_ids'])
+                encoded['loan_ids'].append(loan_id)
+                encoded['first_month'].append(month)
+                for field in LOAN_FIELDS:
+                    encoded[field].append([])
+            for field in LOAN_FIELDS:
+                encoded[field][column].append(to_cents(entry[field]))
+
+    return encoded
+
+
+def _header(layout, schedule):
+    """Build the fields shared by every encoded schedule."""
+    return {
+        'format': SCHEDULE_FORMAT,
+        'version': SCHEDULE_VERSION,
+        'layout': layout,
+        'start_month': schedule[0]['month'],
+        'months': len(schedule),
+    }
+
+
+def schedule_length(schedule):
+    """Return the number of months in a schedule of either format."""
+    if is_columnar(schedule):
+        return schedule['months']
+    return len(schedule or [])
+
+
+def month_range(schedule, loan_ids=None):
+    """Return the first and last month of a schedule, or None if it is empty.
+
+    With ``loan_ids`` the range only covers the months those loans are paid.
+    """
+    if not is_columnar(schedule):
+        months = [
+            month_data['month'] for month_data in schedule or []
+            if loan_ids is None or 'payments' not in month_data
+            or any(loan_id in month_data['payments'] for loan_id in loan_ids)
+        ]
+        return (months[0], months[-1]) if months else None
+
+    if loan_ids is None or schedule['layout'] == 'consolidated':
+        if not schedule['months']:
+            return None
+        return schedule['start_month'], schedule['start_month'] + schedule['months'] - 1
+
+    spans = [
+        (first_month, first_month + len(column) - 1)
+        for loan_id, first_month, column in zip(schedule['loan_ids'], schedule['first_month'], schedule['payment'])
+        if loan_id in loan_ids
+    ]
+    if not spans:
+        return None
+    return min(span[0] for span in spans), max(span[1] for span in spans)
+
+
+def _offsets(schedule, from_month, to_month):
+    """Return the range of row offsets covering ``from_month``..``to_month``."""
+    start_month = schedule['start_month']
+    first = 0 if from_month is None else max(from_month - start_month, 0)
+    last = schedule['months'] if to_month is None else min(to_month - start_month + 1, schedule['months'])
+    return range(first, max(first, last))
+
+
+def iter_schedule(schedule, from_month=None, to_month=None, loan_ids=None):
+    """Yield months of a schedule of either format in the legacy layout.
+
+    ``from_month`` and ``to_month`` bound the months returned (inclusive)
+    and ``loan_ids`` limits the payments to those loans, skipping months in
+    which none of them is paid. For the columnar format only the requested
+    slice and columns are decoded.
+    """
+    if not is_columnar(schedule):
+        for month_data in schedule or []:
+            if from_month is not None and month_data['month'] < from_month:
+                continue
+            if to_month is not None and month_data['month'] > to_month:
+                break
+            if loan_ids is not None and 'payments' in month_data:
+                payments = {
+                    loan_id: entry for loan_id, entry in month_data['payments'].items() if loan_id in loan_ids
+                }
+                if not payments:
+                    continue
+                month_data = dict(month_data, payments=payments)
+            yield month_data
+        return
+
+    start_month = schedule['start_month']
+    if loan_ids is not None and schedule['layout'] == 'loans':
+        bounds = month_range(schedule, loan_ids)
+        if bounds is None:
+            return
+        from_month = bounds[0] if from_month is None else max(from_month, bounds[0])
+        to_month = bounds[1] if to_month is None else min(to_month, bounds[1])
+    offsets = _offsets(schedule, from_month, to_month)
+    if schedule['layout'] == 'consolidated':
+        for offset in offsets:
+            month_data = {'month': start_month + offset}
+            for field in CONSOLIDATED_FIELDS:
+                month_data[field] = from_cents(schedule[field][offset])
+            yield month_data
+        return
+
+    columns = [
+        (column, loan_id) for column, loan_id in enumerate(schedule['loan_ids'])
+        if loan_ids is None or loan_id in loan_ids
+    ]
+    first_months = schedule['first_month']
+    payments, interests, balances = (schedule[field] for field in LOAN_FIELDS)
+
+    for offset in offsets:
+        month = start_month + offset
+        month_payments = {}
+        for column, loan_id in columns:
+            position = month - first_months[column]
+            if 0 <= position < len(payments[column]):
+                month_payments[loan_id] = {
+                    'payment': from_cents(payments[column][position]),
+                    'interest': from_cents(interests[column][position]),
+                    'balance': from_cents(balances[column][position]),
+                }
+        if loan_ids is not None and not month_payments:
+            continue
+        yield {
+            'month': month,
+            'payments': month_payments,
+            'total_payment': from_cents(schedule['total_payment'][offset]),
+            'remaining_balance': from_cents(schedule['remaining_balance'][offset]),
+        }
+
+
+def checkpoint_balances(schedule, month):
+    """Return each loan's balance at the end of ``month`` from a columnar schedule.
+
+    The per-loan balance columns double as month-end checkpoints of the loan
+    state. Loans already paid off by then, or not yet in the plan, are left out.
+    """
+    balances = {}
+    for column, loan_id in enumerate(schedule['loan_ids']):
+        position = month - schedule['first_month'][column]
+        column_balances = schedule['balance'][column]
+        if position < 0 or position >= len(column_balances):
+            continue
+        if position < len(column_balances) - 1 or column_balances[position] > to_cents(0.01):
+            balances[loan_id] = from_cents(column_balances[position])
+    return balances
+
+
+def interest_through(schedule, month):
+    """Return the total interest charged up to and including ``month``."""
+    if not is_columnar(schedule):
+        return sum(
+            entry['interest']
+            for month_data in iter_schedule(schedule, to_month=month)
+            for entry in month_data.get('payments', {}).values()
+        )
+    cents = sum(
+        sum(column[:max(month - first_month + 1, 0)])
+        for first_month, column in zip(schedule['first_month'], schedule['interest'])
+    )
+    return from_cents(cents)
+
+
+def iter_schedule_json(schedule, header=None, chunk_months=12, **filters):
+    """Yield a JSON document holding a schedule, a few months at a time.
+
+    ``header`` fields are written first, followed by a ``schedule`` array
+    whose months are decoded and encoded as they are yielded, so the full
+    list never exists in memory. ``filters`` are passed to ``iter_schedule``.
+    """
+    opening = json.dumps(header or {})[:-1]
+    yield opening + (', "schedule": [' if header else '"schedule": [')
+
+    chunk = []
+    separator = ''
+    for month_data in iter_schedule(schedule, **filters):
+        chunk.append(separator + json.dumps(month_data))
+        separator = ', '
+        if len(chunk) >= chunk_months:
+            yield ''.join(chunk)
+            chunk = []
+    yield ''.join(chunk) + ']}'
+
+
+def decode_schedule(schedule):
+    """Decode a schedule of either format into the legacy list layout."""
+    if not is_columnar(schedule):
+        return schedule or []
+    return list(iter_schedule(schedule))
+
+
+def encode_plan_data(plan_data):
+    """Return a copy of plan data with its schedule in the columnar format."""
+    encoded = dict(plan_data)
+    encoded['schedule'] = encode_schedule(plan_data.get('schedule', []))
+    return encoded
+
+
+def decode_plan_data(plan_data):
+    """Return a copy of plan data with its schedule in the legacy layout."""
+    if not plan_data:
+        return plan_data
+    decoded = dict(plan_data)
+    decoded['schedule'] = decode_schedule(plan_data.get('schedule', []))
+    return decoded
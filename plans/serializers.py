@@ -1,5 +1,8 @@
+from decimal import Decimal
 from rest_framework import serializers
-from .models import DebtPlan, PlanProgress
+from .models import DebtPlan, PlanCalculationJob, PlanProgress
+from .engines import ENGINE_CHOICES, DEFAULT_ENGINE
+from .schedules import decode_plan_data
 
 
 class DebtPlanSerializer(serializers.ModelSerializer):
@@ -7,6 +10,7 @@ class DebtPlanSerializer(serializers.ModelSerializer):
 
     loans_count = serializers.SerializerMethodField()
     is_calculated = serializers.SerializerMethodField()
+    plan_data = serializers.SerializerMethodField()
 
     class Meta:
         model = DebtPlan
@@ -29,6 +33,17 @@ class DebtPlanSerializer(serializers.ModelSerializer):
         """Check if the plan has been calculated."""
         return bool(obj.plan_data)
 
+    def get_plan_data(self, obj):
+        """Return plan data with the schedule in the legacy layout.
+
+        Clients that understand the compact columnar layout can ask for it
+        as stored with ``?schedule_format=columnar``.
+        """
+        request = self.context.get('request')
+        if request is not None and request.query_params.get('schedule_format') == 'columnar':
+            return obj.plan_data
+        return decode_plan_data(obj.plan_data)
+
     def create(self, validated_data):
         """Create a debt plan for the authenticated user."""
         validated_data['user'] = self.context['request'].user
@@ -38,7 +53,7 @@ class DebtPlanSerializer(serializers.ModelSerializer):
         """Validate consolidation-specific fields."""
         method = data.get('method')
         if method == 'consolidation':
-            if not data.get('consolidation_rate'):
+            if data.get('consolidation_rate') is None:
                 raise serializers.ValidationError({
                     'consolidation_rate': 'This field is required for consolidation plans.'
                 })
@@ -60,6 +75,10 @@ class DebtPlanCalculateSerializer(serializers.Serializer):
         max_digits=5, decimal_places=2, required=False, min_value=0, max_value=100
     )
     consolidation_term = serializers.IntegerField(required=False, min_value=1, max_value=360)
+    engine = serializers.ChoiceField(choices=ENGINE_CHOICES, default=DEFAULT_ENGINE)
+    mode = serializers.ChoiceField(
+        choices=[('summary', 'Summary only'), ('full', 'Full schedule')], default='summary'
+    )
 
     def validate(self, data):
         """Validate consolidation-specific fields."""
@@ -76,6 +95,149 @@ class DebtPlanCalculateSerializer(serializers.Serializer):
         return data
 
 
+class ExtraPaymentSweepSerializer(serializers.Serializer):
+    """Serializer for an extra-payment sweep request."""
+
+    MAX_POINTS = 200
+
+    method = serializers.ChoiceField(choices=[
+        ('snowball', 'Debt Snowball'),
+        ('avalanche', 'Debt Avalanche'),
+    ])
+    extra_payments = serializers.ListField(
+        child=serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0),
+        required=False, allow_empty=False, max_length=MAX_POINTS
+    )
+    start = serializers.DecimalField(max_digits=10, decimal_places=2, default=0, min_value=0)
+    stop = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, min_value=0)
+    step = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, min_value=Decimal('0.01'))
+
+    def validate(self, data):
+        """Expand a start/stop/step range into an explicit list of amounts."""
+        if 'extra_payments' in data:
+            return data
+
+        if 'stop' not in data or 'step' not in data:
+            raise serializers.ValidationError(
+                'Provide either extra_payments or a stop and step for the range.'
+            )
+        if data['stop'] < data['start']:
+            raise serializers.ValidationError({'stop': 'Stop must not be less than start.'})
+
+        points = int((data['stop'] - data['start']) / data['step']) + 1
+        if points > self.MAX_POINTS:
+            raise serializers.ValidationError(
+                f'A sweep cannot have more than {self.MAX_POINTS} points.'
+            )
+        data['extra_payments'] = [data['start'] + data['step'] * i for i in range(points)]
+        return data
+
+
+class ConsolidationScanSerializer(serializers.Serializer):
+    """Serializer for scanning consolidation offers over a grid of rates and terms."""
+
+    MAX_RATES = 100
+    MAX_TERMS = 60
+
+    rates = serializers.ListField(
+        child=serializers.DecimalField(max_digits=5, decimal_places=2, min_value=0, max_value=100),
+        required=False, allow_empty=False, max_length=MAX_RATES
+    )
+    rate_start = serializers.DecimalField(max_digits=5, decimal_places=2, required=False, min_value=0)
+    rate_stop = serializers.DecimalField(max_digits=5, decimal_places=2, required=False, max_value=100)
+    rate_step = serializers.DecimalField(max_digits=5, decimal_places=2, required=False, min_value=Decimal('0.01'))
+    terms = serializers.ListField(
+        child=serializers.IntegerField(min_value=6, max_value=360),
+        allow_empty=False, max_length=MAX_TERMS
+    )
+    extra_payment = serializers.DecimalField(max_digits=10, decimal_places=2, default=0, min_value=0)
+
+    def validate(self, data):
+        """Expand a rate_start/rate_stop/rate_step range into an explicit list of rates."""
+        if 'rates' in data:
+            return data
+
+        if not all(field in data for field in ('rate_start', 'rate_stop', 'rate_step')):
+            raise serializers.ValidationError(
+                'Provide either rates or a rate_start, rate_stop and rate_step for the range.'
+            )
+        if data['rate_stop'] < data['rate_start']:
+            raise serializers.ValidationError({'rate_stop': 'Stop must not be less than start.'})
+
+        points = int((data['rate_stop'] - data['rate_start']) / data['rate_step']) + 1
+        if points > self.MAX_RATES:
+            raise serializers.ValidationError(
+                f'A scan cannot have more than {self.MAX_RATES} rates.'
+            )
+        data['rates'] = [data['rate_start'] + data['rate_step'] * i for i in range(points)]
+        return data
+
+
+class TargetSolveSerializer(serializers.Serializer):
+    """Serializer for solving the extra payment needed to meet a target."""
+
+    method = serializers.ChoiceField(choices=[
+        ('snowball', 'Debt Snowball'),
+        ('avalanche', 'Debt Avalanche'),
+    ])
+    target_months = serializers.IntegerField(required=False, min_value=1, max_value=600)
+    max_interest = serializers.DecimalField(max_digits=12, decimal_places=2, required=False, min_value=0)
+
+    def validate(self, data):
+        """Require a payoff month or an interest budget to solve for."""
+        if 'target_months' not in data and 'max_interest' not in data:
+            raise serializers.ValidationError('Provide a target_months or max_interest to solve for.')
+        return data
+
+
+class StressTestSerializer(serializers.Serializer):
+    """Serializer for an interest-rate stress test request."""
+
+    MAX_TRIALS = 10000
+
+    method = serializers.ChoiceField(choices=[
+        ('snowball', 'Debt Snowball'),
+        ('avalanche', 'Debt Avalanche'),
+    ])
+    extra_payment = serializers.DecimalField(max_digits=10, decimal_places=2, default=0, min_value=0)
+    trials = serializers.IntegerField(default=2000, min_value=1, max_value=MAX_TRIALS)
+    rate_volatility = serializers.DecimalField(
+        max_digits=5, decimal_places=2, default=Decimal('2.00'), min_value=0, max_value=50,
+        help_text="Yearly standard deviation of variable rates, in APR percentage points"
+    )
+    seed = serializers.IntegerField(required=False, min_value=0)
+
+
+class ScheduleQuerySerializer(serializers.Serializer):
+    """Serializer for schedule page query parameters."""
+
+    MAX_LIMIT = 120
+
+    from_month = serializers.IntegerField(required=False, min_value=1)
+    to_month = serializers.IntegerField(required=False, min_value=1)
+    cursor = serializers.IntegerField(required=False, min_value=1)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=MAX_LIMIT, default=24)
+    loan = serializers.ListField(child=serializers.CharField(), required=False)
+
+    def validate(self, data):
+        """Validate the month range."""
+        if data.get('from_month') and data.get('to_month') and data['from_month'] > data['to_month']:
+            raise serializers.ValidationError("from_month cannot be after to_month.")
+        return data
+
+
+class MethodComparisonSerializer(serializers.Serializer):
+    """Serializer for comparing every method against the user's current loans."""
+
+    extra_payment = serializers.DecimalField(
+        max_digits=10, decimal_places=2, default=0, min_value=0
+    )
+    consolidation_rate = serializers.DecimalField(
+        max_digits=5, decimal_places=2, required=False, min_value=0, max_value=100
+    )
+    consolidation_term = serializers.IntegerField(required=False, min_value=1, max_value=360)
+
+
 class PlanProgressSerializer(serializers.ModelSerializer):
     """Serializer for PlanProgress model."""
 
@@ -94,6 +256,21 @@ class PlanProgressSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class PlanCalculationJobSerializer(serializers.ModelSerializer):
+    """Serializer for PlanCalculationJob model."""
+
+    queued_seconds = serializers.ReadOnlyField()
+    run_seconds = serializers.ReadOnlyField()
+
+    class Meta:
+        model = PlanCalculationJob
+        fields = [
+            'id', 'plan', 'engine', 'status', 'error', 'attempts', 'created_at', 'started_at',
+            'finished_at', 'queued_seconds', 'run_seconds'
+        ]
+        read_only_fields = fields
+
+
 class DebtPlanSummarySerializer(serializers.Serializer):
     """Serializer for debt plan summary."""
 
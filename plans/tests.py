@@ -1,3 +1,1237 @@
-from django.test import TestCase
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+from datetime import date, timedelta
+from decimal import Decimal
+import json
+from io import StringIO
+from pathlib import Path
+import tempfile
+from unittest import mock
+from rest_framework.test import APITestCase
+from rest_framework import status
+from billing.models import SubscriptionPlan, UserSubscription
+from loans.models import Loan
+from .benchmarks import synthetic_portfolio
+from .cache import PlanCalculationCache, plan_cache, plan_inputs
+from .engines import minimum_payment_baseline, simulate_events
+from .golden import EDGE_CASES, calculate_case, first_divergence, golden_cases
+from .models import DebtPlan, PlanCalculationJob
+from .schedules import checkpoint_balances, decode_schedule, encode_plan_data, encode_schedule, is_columnar
+from .serializers import DebtPlanSerializer
 
-# Create your tests here.
+
+class PlanTestMixin:
+    """Shared fixtures for plan calculation tests."""
+
+    def create_loans(self, user=None):
+        loans = [
+            ('Credit Card', '4500.00', '22.99', '135.00'),
+            ('Car Loan', '12000.00', '6.50', '310.00'),
+            ('Student Loan', '28000.00', '4.25', '290.00'),
+            ('Store Card', '800.00', '27.50', '35.00'),
+            ('Medical Bill', '1200.00', '0.00', '50.00'),
+        ]
+        for name, balance, rate, minimum in loans:
+            Loan.objects.create(
+                user=user or self.user,
+                name=name,
+                balance=Decimal(balance),
+                interest_rate=Decimal(rate),
+                minimum_payment=Decimal(minimum)
+            )
+
+    def assertSchedulesMatch(self, expected, actual, tolerance=0.01):
+        """Assert two snowball/avalanche schedules agree within a cent."""
+        self.assertEqual(len(expected), len(actual))
+        for expected_month, actual_month in zip(expected, actual):
+            self.assertEqual(expected_month['month'], actual_month['month'])
+            self.assertEqual(list(expected_month['payments']), list(actual_month['payments']))
+            self.assertAlmostEqual(expected_month['total_payment'], actual_month['total_payment'], delta=tolerance)
+            self.assertAlmostEqual(
+                expected_month['remaining_balance'], actual_month['remaining_balance'], delta=tolerance
+            )
+            for loan_id, expected_payment in expected_month['payments'].items():
+                actual_payment = actual_month['payments'][loan_id]
+                for field in ('payment', 'interest', 'balance'):
+                    self.assertAlmostEqual(expected_payment[field], actual_payment[field], delta=tolerance)
+
+
+class CalculationEngineTest(PlanTestMixin, TestCase):
+    """Test cases for the alternative plan calculation engines."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.create_loans()
+
+    def test_engines_match_reference(self):
+        """Test the alternative engines reproduce the reference schedules."""
+        for engine in ('numpy', 'event'):
+            for method in ('snowball', 'avalanche'):
+                for extra_payment in (Decimal('0'), Decimal('250.00')):
+                    plan = DebtPlan(user=self.user, name='Test Plan', method=method, extra_payment=extra_payment)
+                    expected = plan.calculate_plan()
+                    actual = plan.calculate_plan(engine=engine)
+
+                    self.assertEqual(expected['payoff_months'], actual['payoff_months'])
+                    self.assertAlmostEqual(expected['total_interest'], actual['total_interest'], delta=0.01)
+                    self.assertEqual(expected['summary'], actual['summary'])
+                    self.assertSchedulesMatch(expected['schedule'], actual['schedule'])
+
+    def test_event_engine_skips_schedule_when_not_requested(self):
+        """Test the event engine returns totals without building monthly rows."""
+        plan = DebtPlan(user=self.user, name='Test Plan', method='avalanche', extra_payment=Decimal('100.00'))
+        full = plan.calculate_plan(engine='event')
+        summary_only = plan.calculate_plan(engine='event', include_schedule=False)
+
+        self.assertEqual(summary_only['schedule'], [])
+        self.assertEqual(summary_only['payoff_months'], full['payoff_months'])
+        self.assertEqual(summary_only['total_interest'], full['total_interest'])
+
+    def test_reference_engine_retires_paid_off_loans(self):
+        """Test the reference engine drops loans once paid off, with or without a schedule."""
+        plan = DebtPlan(user=self.user, name='Test Plan', method='snowball', extra_payment=Decimal('100.00'))
+        full = plan.calculate_plan()
+        summary_only = plan.calculate_plan(include_schedule=False)
+
+        active = set(full['schedule'][0]['payments'])
+        for month_data in full['schedule']:
+            self.assertLessEqual(set(month_data['payments']), active)
+            active = set(month_data['payments'])
+        self.assertEqual(full['summary']['remaining_loans'], 0)
+        self.assertEqual(summary_only['payoff_months'], full['payoff_months'])
+        self.assertEqual(summary_only['total_interest'], full['total_interest'])
+
+    def test_cents_engine_totals_are_exact(self):
+        """Test the integer-cent engine stays close to the reference with exact totals."""
+        for method in ('snowball', 'avalanche'):
+            plan = DebtPlan(user=self.user, name='Test Plan', method=method, extra_payment=Decimal('250.00'))
+            expected = plan.calculate_plan()
+            actual = plan.calculate_plan(engine='cents')
+
+            self.assertLessEqual(abs(expected['payoff_months'] - actual['payoff_months']), 1)
+            self.assertAlmostEqual(expected['total_interest'], actual['total_interest'], delta=1)
+
+            interest_cents = sum(
+                round(entry['interest'] * 100)
+                for month in actual['schedule']
+                for entry in month['payments'].values()
+            )
+            self.assertEqual(round(actual['total_interest'] * 100), interest_cents)
+            self.assertEqual(actual, plan.calculate_plan(engine='cents'))
+
+    def test_cents_engine_consolidation_schedule(self):
+        """Test the integer-cent consolidation schedule repays the debt to the cent."""
+        plan = DebtPlan(
+            user=self.user,
+            name='Test Plan',
+            method='consolidation',
+            consolidation_rate=Decimal('9.99'),
+            consolidation_term=60
+        )
+        expected = plan.calculate_plan()
+        actual = plan.calculate_plan(engine='cents')
+        schedule = actual['schedule']
+
+        self.assertEqual(actual['payoff_months'], 60)
+        self.assertEqual(schedule[-1]['remaining_balance'], 0)
+        self.assertEqual(
+            sum(round(month['principal'] * 100) for month in schedule), round(actual['total_debt'] * 100)
+        )
+        self.assertAlmostEqual(actual['total_interest'], expected['total_interest'], delta=1)
+        self.assertAlmostEqual(actual['monthly_payment'], schedule[0]['payment'], delta=0.001)
+
+    def test_consolidation_baseline_simulated_once(self):
+        """Test interest saved is measured against one cached minimum-payment run."""
+        plan_cache.clear()
+        plan = DebtPlan(user=self.user, name='Test Plan', method='consolidation', consolidation_term=60)
+
+        with mock.patch('plans.cache.minimum_payment_baseline', wraps=minimum_payment_baseline) as baseline:
+            results = []
+            for rate in ('6.00', '9.99', '14.50'):
+                plan.consolidation_rate = Decimal(rate)
+                results.append(plan.calculate_plan())
+        baseline.assert_called_once()
+
+        for plan_data in results:
+            summary = plan_data['summary']
+            schedule = plan_data['schedule']
+            self.assertEqual(len(schedule), 60)
+            self.assertEqual(schedule[-1]['remaining_balance'], 0)
+            self.assertAlmostEqual(
+                sum(month['interest'] for month in schedule), plan_data['total_interest'], delta=0.5
+            )
+            self.assertTrue(summary['baseline_paid_off'])
+            # Both sides are rounded separately, so allow a cent either way
+            self.assertAlmostEqual(
+                summary['interest_saved'], max(0, summary['baseline_interest'] - plan_data['total_interest']),
+                delta=0.01 + 1e-6
+            )
+
+    def test_consolidation_baseline_that_never_pays_off(self):
+        """Test no saving is claimed when minimum payments never clear the debt."""
+        Loan.objects.create(
+            user=self.user,
+            name='Underwater Loan',
+            balance=Decimal('50000.00'),
+            interest_rate=Decimal('24.00'),
+            minimum_payment=Decimal('100.00')
+        )
+        plan = DebtPlan(
+            user=self.user, name='Test Plan', method='consolidation',
+            consolidation_rate=Decimal('9.99'), consolidation_term=60
+        )
+        summary = plan.calculate_plan()['summary']
+
+        self.assertFalse(summary['baseline_paid_off'])
+        self.assertEqual(summary['baseline_months'], 360)
+        self.assertIsNone(summary['interest_saved'])
+
+    def test_numpy_engine_stops_at_month_cap(self):
+        """Test the NumPy engine honours the 600 month cap for unpayable debt."""
+        Loan.objects.filter(user=self.user).delete()
+        Loan.objects.create(
+            user=self.user,
+            name='Underwater Loan',
+            balance=Decimal('50000.00'),
+            interest_rate=Decimal('24.00'),
+            minimum_payment=Decimal('100.00')
+        )
+        plan = DebtPlan(user=self.user, name='Test Plan', method='avalanche')
+        plan_data = plan.calculate_plan(engine='numpy')
+
+        self.assertEqual(plan_data['payoff_months'], 600)
+        self.assertEqual(plan_data['summary']['remaining_loans'], 1)
+
+    def test_batched_plans_match_single_plans(self):
+        """Test plans calculated together match calculating each one alone."""
+        other_user = User.objects.create_user(username='otheruser', password='testpass123')
+        Loan.objects.create(
+            user=other_user, name='Overdraft', balance=Decimal('650.00'),
+            interest_rate=Decimal('19.00'), minimum_payment=Decimal('40.00')
+        )
+        empty_user = User.objects.create_user(username='emptyuser', password='testpass123')
+        plans = [
+            DebtPlan(user=self.user, name='Snowball', method='snowball', extra_payment=Decimal('250.00')),
+            DebtPlan(user=other_user, name='Avalanche', method='avalanche', extra_payment=Decimal('0')),
+            DebtPlan(user=empty_user, name='Empty', method='snowball', extra_payment=Decimal('100.00')),
+            DebtPlan(user=self.user, name='Avalanche', method='avalanche', extra_payment=Decimal('0')),
+            DebtPlan(
+                user=self.user, name='Consolidation', method='consolidation',
+                consolidation_rate=Decimal('8.00'), consolidation_term=60
+            ),
+        ]
+
+        results = DebtPlan.calculate_many(plans, batch_size=2)
+
+        self.assertEqual(len(results), len(plans))
+        for plan, actual in zip(plans, results):
+            expected = plan.calculate_plan()
+            self.assertEqual(expected['payoff_months'], actual['payoff_months'])
+            self.assertAlmostEqual(expected['total_interest'], actual['total_interest'], delta=0.01)
+            self.assertEqual(expected['summary'], actual['summary'])
+            if plan.method != 'consolidation':
+                self.assertSchedulesMatch(expected['schedule'], actual['schedule'])
+
+
+class IncrementalRecalculationTest(PlanTestMixin, TestCase):
+    """Test cases for resuming a stored plan from the present month."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.create_loans()
+        self.plan = DebtPlan.objects.create(
+            user=self.user, name='Test Plan', method='snowball', extra_payment=Decimal('150.00')
+        )
+        loans = list(self.plan.loans)
+        self.plan.plan_data = dict(
+            encode_plan_data(self.plan.calculate_plan(engine='numpy', loans=loans)),
+            calculated_at='2026-01-15',
+            inputs=plan_inputs(self.plan, loans),
+            engine='numpy'
+        )
+        self.plan.save()
+
+    def test_unchanged_plan_is_not_resimulated(self):
+        """Test a recalculation with unchanged loans returns the stored plan data."""
+        plan_data = self.plan.recalculate(engine='numpy', today=date(2026, 4, 1))
+        self.assertIs(plan_data, self.plan.plan_data)
+
+    def test_unchanged_plan_with_other_engine_needs_full_calculation(self):
+        """Test stored plan data is not returned for an engine it was not calculated with."""
+        self.assertIsNone(self.plan.recalculate(engine='event', today=date(2026, 4, 1)))
+
+    def test_balance_update_resumes_from_present_month(self):
+        """Test a balance update keeps elapsed months and matches a full run after them."""
+        loan = Loan.objects.get(user=self.user, name='Student Loan')
+        checkpoint = checkpoint_balances(self.plan.plan_data['schedule'], 3)
+        loan.balance = Decimal(str(checkpoint[str(loan.id)]))
+        loan.save()
+
+        plan_data = self.plan.recalculate(today=date(2026, 4, 20))
+
+        self.assertEqual(plan_data['summary']['resumed_from_month'], 3)
+        self.assertEqual(plan_data['payoff_months'], self.plan.plan_data['payoff_months'])
+        self.assertAlmostEqual(plan_data['total_interest'], self.plan.plan_data['total_interest'], delta=0.05)
+        self.assertSchedulesMatch(
+            self.plan.schedule, decode_schedule(plan_data['schedule']), tolerance=0.02
+        )
+
+    def test_deactivated_loan_drops_out_from_present_month(self):
+        """Test a deactivated loan keeps its history but is not paid after the present month."""
+        loan = Loan.objects.get(user=self.user, name='Car Loan')
+        loan.is_active = False
+        loan.save()
+
+        plan_data = self.plan.recalculate(today=date(2026, 3, 1))
+        schedule = decode_schedule(plan_data['schedule'])
+
+        self.assertEqual(schedule[:2], self.plan.schedule[:2])
+        self.assertTrue(all(str(loan.id) not in month['payments'] for month in schedule[2:]))
+        self.assertEqual(plan_data['summary']['loans_paid_off'], 4)
+        self.assertEqual(plan_data['inputs'], plan_inputs(self.plan, self.plan.loans))
+
+    def test_total_debt_matches_current_loans(self):
+        """Test the total debt follows balance changes and removed loans, as a full calculation would."""
+        Loan.objects.filter(user=self.user, name='Credit Card').update(balance=Decimal('4000.00'))
+        Loan.objects.filter(user=self.user, name='Car Loan').update(is_active=False)
+
+        plan_data = self.plan.recalculate(today=date(2026, 4, 1))
+
+        self.assertEqual(plan_data['total_debt'], self.plan.calculate_plan(include_schedule=False)['total_debt'])
+        self.assertEqual(plan_data['total_debt'], 34000.00)
+
+    def test_paid_off_loan_reentering_starts_new_column(self):
+        """Test a paid off loan whose balance is raised is paid again from the present month."""
+        loan = Loan.objects.get(user=self.user, name='Store Card')
+        loan_id = str(loan.id)
+        paid_off_month = max(month['month'] for month in self.plan.schedule if loan_id in month['payments'])
+        self.assertLess(paid_off_month, 6)
+        loan.balance = Decimal('500.00')
+        loan.save()
+
+        plan_data = self.plan.recalculate(today=date(2026, 7, 10))
+        schedule = decode_schedule(plan_data['schedule'])
+        paid_months = [month['month'] for month in schedule if loan_id in month['payments']]
+
+        self.assertEqual(plan_data['summary']['resumed_from_month'], 6)
+        self.assertEqual(schedule[:6], self.plan.schedule[:6])
+        self.assertEqual(plan_data['schedule']['loan_ids'].count(loan_id), 2)
+        self.assertEqual(paid_months[:paid_off_month], list(range(1, paid_off_month + 1)))
+        self.assertEqual(paid_months[paid_off_month:], list(range(7, paid_months[-1] + 1)))
+        self.assertAlmostEqual(
+            schedule[6]['payments'][loan_id]['interest'], round(500 * 0.275 / 12, 2), delta=0.01
+        )
+
+    def test_change_in_calculation_month_needs_full_calculation(self):
+        """Test nothing is resumed when no month has elapsed yet."""
+        Loan.objects.filter(user=self.user, name='Credit Card').update(balance=Decimal('4000.00'))
+        self.assertIsNone(self.plan.recalculate(today=date(2026, 1, 31)))
+
+
+class ScheduleFormatTest(PlanTestMixin, TestCase):
+    """Test cases for the columnar schedule storage format."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.create_loans()
+
+    def test_columnar_round_trip(self):
+        """Test encoding and decoding a schedule preserves every month."""
+        plan = DebtPlan(user=self.user, name='Test Plan', method='snowball', extra_payment=Decimal('150.00'))
+        schedule = plan.calculate_plan()['schedule']
+        encoded = encode_schedule(schedule)
+
+        self.assertTrue(is_columnar(encoded))
+        self.assertEqual(encoded['months'], len(schedule))
+        self.assertEqual(len(encoded['loan_ids']), 5)
+        self.assertSchedulesMatch(schedule, decode_schedule(encoded))
+
+    def test_consolidation_round_trip(self):
+        """Test consolidation schedules use the single-loan columnar layout."""
+        plan = DebtPlan(
+            user=self.user,
+            name='Test Plan',
+            method='consolidation',
+            consolidation_rate=Decimal('9.50'),
+            consolidation_term=60
+        )
+        schedule = plan.calculate_plan()['schedule']
+        encoded = encode_schedule(schedule)
+
+        self.assertEqual(encoded['layout'], 'consolidated')
+        self.assertEqual(decode_schedule(encoded), schedule)
+
+    def test_legacy_schedule_is_read_unchanged(self):
+        """Test plans saved in the legacy layout are still readable."""
+        plan = DebtPlan(user=self.user, name='Test Plan', method='avalanche')
+        plan_data = plan.calculate_plan()
+        plan.plan_data = plan_data
+
+        self.assertEqual(plan.schedule, plan_data['schedule'])
+        self.assertEqual(plan.schedule_months, len(plan_data['schedule']))
+
+    def test_serializer_decodes_columnar_schedule(self):
+        """Test the API keeps returning the legacy schedule layout."""
+        plan = DebtPlan.objects.create(user=self.user, name='Test Plan', method='avalanche')
+        plan_data = plan.calculate_plan()
+        plan.plan_data = encode_plan_data(plan_data)
+        plan.save()
+
+        data = DebtPlanSerializer(plan).data
+        self.assertIsInstance(data['plan_data']['schedule'], list)
+        self.assertSchedulesMatch(plan_data['schedule'], data['plan_data']['schedule'])
+
+
+class CalculationCacheTest(PlanTestMixin, TestCase):
+    """Test cases for the plan calculation cache."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.create_loans()
+        self.cache = PlanCalculationCache(max_entries=2, timeout=60)
+
+    def test_repeat_calculation_hits_cache(self):
+        """Test unchanged inputs skip the engine on the second calculation."""
+        plan = DebtPlan(user=self.user, name='Test Plan', method='avalanche')
+        first = self.cache.calculate(plan)
+
+        with mock.patch.object(DebtPlan, 'calculate_plan') as calculate_plan:
+            second = self.cache.calculate(plan)
+            calculate_plan.assert_not_called()
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_changed_inputs_miss_cache(self):
+        """Test a changed extra payment or loan balance is recalculated."""
+        plan = DebtPlan(user=self.user, name='Test Plan', method='avalanche')
+        self.cache.calculate(plan)
+
+        plan.extra_payment = Decimal('100.00')
+        self.cache.calculate(plan)
+        Loan.objects.filter(user=self.user, name='Car Loan').update(balance=Decimal('11000.00'))
+        self.cache.calculate(plan)
+
+        self.assertEqual(self.cache.stats()['misses'], 3)
+
+    def test_missing_consolidation_rate_does_not_share_zero_rate_entry(self):
+        """Test a plan without a consolidation rate and a 0% offer are cached apart."""
+        plan = DebtPlan(user=self.user, name='Test Plan', method='consolidation', consolidation_term=36)
+        self.assertEqual(self.cache.calculate(plan)['payoff_months'], 0)
+
+        plan.consolidation_rate = Decimal('0.00')
+        self.assertEqual(self.cache.calculate(plan)['payoff_months'], 36)
+        self.assertEqual(self.cache.stats()['misses'], 2)
+
+    def test_identical_portfolio_shared_across_users(self):
+        """Test another user's identical portfolio reuses the entry with its own loan ids."""
+        other_user = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='otherpass123'
+        )
+        self.create_loans(user=other_user)
+        self.cache.calculate(DebtPlan(user=self.user, name='Test Plan', method='snowball'))
+
+        other_plan = DebtPlan(user=other_user, name='Other Plan', method='snowball')
+        plan_data = self.cache.calculate(other_plan)
+
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        other_ids = {str(loan.id) for loan in other_plan.loans}
+        self.assertEqual(set(plan_data['schedule']['loan_ids']), other_ids)
+
+    def test_lru_and_ttl_eviction(self):
+        """Test the least recently used and expired entries are evicted."""
+        plan = DebtPlan(user=self.user, name='Test Plan', method='snowball')
+        for extra_payment in ('0', '50', '100'):
+            plan.extra_payment = Decimal(extra_payment)
+            self.cache.calculate(plan)
+        self.assertEqual(self.cache.stats()['entries'], 2)
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+        with mock.patch('plans.cache.time.monotonic', return_value=float('inf')):
+            self.cache.calculate(plan)
+        self.assertEqual(self.cache.stats()['hits'], 0)
+
+
+class ScheduleStreamAPITest(PlanTestMixin, APITestCase):
+    """Test cases for the streaming schedule endpoint."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.create_loans()
+        self.plan = DebtPlan.objects.create(user=self.user, name='Test Plan', method='snowball')
+        self.plan.plan_data = encode_plan_data(self.plan.calculate_plan())
+        self.plan.save()
+        self.client.force_authenticate(user=self.user)
+
+    def test_schedule_is_streamed(self):
+        """Test the schedule arrives in chunks and decodes to the stored schedule."""
+        response = self.client.get(f'/api/plans/plans/{self.plan.id}/schedule/stream/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 2)
+
+        data = json.loads(b''.join(chunks))
+        self.assertEqual(data['months'], self.plan.schedule_months)
+        self.assertEqual(data['schedule'], self.plan.schedule)
+
+    def test_other_users_plan_is_not_found(self):
+        """Test a user cannot stream another user's schedule."""
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.client.force_authenticate(user=other)
+
+        response = self.client.get(f'/api/plans/plans/{self.plan.id}/schedule/stream/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ScheduleAPITest(PlanTestMixin, APITestCase):
+    """Test cases for the paginated schedule endpoint."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.create_loans()
+        self.plan = DebtPlan.objects.create(user=self.user, name='Test Plan', method='snowball')
+        self.plan.plan_data = encode_plan_data(self.plan.calculate_plan())
+        self.plan.save()
+        self.url = f'/api/plans/plans/{self.plan.id}/schedule/'
+        self.client.force_authenticate(user=self.user)
+
+    def test_month_range(self):
+        """Test a month range returns just those months."""
+        response = self.client.get(self.url, {'from_month': 5, 'to_month': 9})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], self.plan.schedule[4:9])
+        self.assertIsNone(response.data['next_cursor'])
+
+    def test_cursor_pages_cover_schedule(self):
+        """Test following cursors returns every month exactly once."""
+        months = []
+        params = {'limit': 10}
+        while True:
+            response = self.client.get(self.url, params)
+            months.extend(response.data['results'])
+            if response.data['next_cursor'] is None:
+                break
+            params['cursor'] = response.data['next_cursor']
+
+        self.assertEqual(months, self.plan.schedule)
+
+    def test_single_loan_drill_down(self):
+        """Test filtering by loan returns only that loan's months and payments."""
+        loan = Loan.objects.get(user=self.user, name='Store Card')
+        loan_id = str(loan.id)
+        expected = [
+            dict(month, payments={loan_id: month['payments'][loan_id]})
+            for month in self.plan.schedule if loan_id in month['payments']
+        ]
+
+        response = self.client.get(self.url, {'loan': loan_id, 'limit': 120})
+
+        self.assertEqual(response.data['months'], len(expected))
+        self.assertEqual(response.data['results'], expected)
+
+    def test_invalid_range(self):
+        """Test a reversed month range is rejected."""
+        response = self.client.get(self.url, {'from_month': 9, 'to_month': 5})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_preview_decodes_only_first_months(self):
+        """Test the plan preview holds the first months of the schedule."""
+        self.assertEqual(self.plan.schedule_preview, self.plan.schedule[:DebtPlan.PREVIEW_MONTHS])
+
+
+class SimulateAPITest(PlanTestMixin, APITestCase):
+    """Test cases for the stateless scenario endpoint."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        from rest_framework.authtoken.models import Token
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.create_loans()
+
+    def test_simulate_summary(self):
+        """Test a summary scenario returns totals without writing a plan."""
+        data = {'method': 'avalanche', 'extra_payment': '200.00'}
+        response = self.client.post('/api/plans/plans/simulate/', data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['schedule'], [])
+        self.assertGreater(response.data['payoff_months'], 0)
+        self.assertEqual(response.data['summary']['method'], 'avalanche')
+        self.assertEqual(DebtPlan.objects.count(), 0)
+
+    def test_simulate_full_schedule(self):
+        """Test the full mode returns the schedule in the legacy layout."""
+        data = {'method': 'snowball', 'extra_payment': '0', 'mode': 'full', 'engine': 'event'}
+        response = self.client.post('/api/plans/plans/simulate/', data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['schedule']), response.data['payoff_months'])
+        self.assertIn('payments', response.data['schedule'][0])
+
+    def test_simulate_validation(self):
+        """Test consolidation scenarios require a rate and term."""
+        data = {'method': 'consolidation', 'consolidation_rate': '8.00'}
+        response = self.client.post('/api/plans/plans/simulate/', data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('consolidation_term', response.data)
+
+
+class SweepAPITest(PlanTestMixin, APITestCase):
+    """Test cases for the extra-payment sweep endpoint."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        from rest_framework.authtoken.models import Token
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.create_loans()
+
+    def test_sweep_matches_single_calculations(self):
+        """Test every swept amount agrees with a single plan calculation."""
+        data = {'method': 'avalanche', 'extra_payments': ['0', '100.00', '500.00']}
+        response = self.client.post('/api/plans/plans/sweep/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        for result in response.data['results']:
+            plan = DebtPlan(user=self.user, method='avalanche', extra_payment=Decimal(str(result['extra_payment'])))
+            plan_data = plan.calculate_plan()
+            self.assertEqual(result['payoff_months'], plan_data['payoff_months'])
+            self.assertAlmostEqual(result['total_interest'], plan_data['total_interest'], delta=0.01)
+
+    def test_sweep_range(self):
+        """Test a start/stop/step range expands and reports savings."""
+        data = {'method': 'snowball', 'start': '0', 'stop': '1000.00', 'step': '250.00'}
+        response = self.client.post('/api/plans/plans/sweep/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        results = response.data['results']
+        self.assertEqual([result['extra_payment'] for result in results], [0, 250, 500, 750, 1000])
+        self.assertEqual(results[0]['months_saved'], 0)
+        months_saved = [result['months_saved'] for result in results]
+        self.assertEqual(months_saved, sorted(months_saved))
+
+    def test_sweep_rejects_too_many_points(self):
+        """Test the sweep size is bounded."""
+        data = {'method': 'snowball', 'start': '0', 'stop': '10000.00', 'step': '1.00'}
+        response = self.client.post('/api/plans/plans/sweep/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TargetSolveAPITest(PlanTestMixin, APITestCase):
+    """Test cases for the required extra payment solver endpoint."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.create_loans()
+
+    def payoff(self, method, extra_payment):
+        plan = DebtPlan(user=self.user, method=method, extra_payment=Decimal(str(extra_payment)))
+        return plan.calculate_plan(engine='event', include_schedule=False)
+
+    def test_solves_target_month(self):
+        """Test the solved extra payment is the smallest one meeting the target month."""
+        data = {'method': 'avalanche', 'target_months': 36}
+        response = self.client.post('/api/plans/plans/solve/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        extra_payment = response.data['extra_payment']
+        self.assertTrue(response.data['feasible'])
+        self.assertLessEqual(response.data['evaluations'], 40)
+        self.assertLessEqual(self.payoff('avalanche', extra_payment)['payoff_months'], 36)
+        self.assertGreater(self.payoff('avalanche', round(extra_payment - 0.01, 2))['payoff_months'], 36)
+
+    def test_solves_interest_budget(self):
+        """Test the solved extra payment keeps total interest within the budget."""
+        data = {'method': 'snowball', 'max_interest': '5000.00'}
+        response = self.client.post('/api/plans/plans/solve/', data, format='json')
+
+        # Compare unrounded totals, since the budget can fall within a cent of them
+        plan = DebtPlan(user=self.user, method='snowball')
+        loan_data = plan._ordered_loan_data(list(plan.loans))
+        base_payment = sum(loan['minimum_payment'] for loan in loan_data)
+        extra_payment = response.data['extra_payment']
+        self.assertLessEqual(simulate_events(loan_data, base_payment + extra_payment).total_interest, 5000)
+        self.assertGreater(simulate_events(loan_data, base_payment + extra_payment - 0.01).total_interest, 5000)
+
+    def test_unreachable_target(self):
+        """Test a target that cannot be met is reported as infeasible."""
+        data = {'method': 'snowball', 'target_months': 1}
+        response = self.client.post('/api/plans/plans/solve/', data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['feasible'])
+        self.assertIsNone(response.data['extra_payment'])
+
+    def test_requires_target(self):
+        """Test a payoff month or interest budget is required."""
+        response = self.client.post('/api/plans/plans/solve/', {'method': 'snowball'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class StressTestAPITest(PlanTestMixin, APITestCase):
+    """Test cases for the interest-rate stress test endpoint."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.create_loans()
+        Loan.objects.filter(name__in=['Credit Card', 'Store Card']).update(loan_type='credit_card')
+
+    def test_zero_volatility_matches_fixed_rates(self):
+        """Test every trial agrees with the fixed-rate plan when rates cannot move."""
+        data = {'method': 'avalanche', 'extra_payment': '200.00', 'trials': 50, 'rate_volatility': '0'}
+        response = self.client.post('/api/plans/plans/stress/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        plan_data = DebtPlan(user=self.user, method='avalanche', extra_payment=Decimal('200.00')).calculate_plan()
+        self.assertEqual(response.data['variable_loans'], 2)
+        self.assertEqual(set(response.data['payoff_months'].values()), {plan_data['payoff_months']})
+        for value in response.data['total_interest'].values():
+            self.assertAlmostEqual(value, plan_data['total_interest'], delta=0.01)
+
+    def test_bands_are_ordered_and_seeded(self):
+        """Test percentile bands are ordered and a seed makes runs repeatable."""
+        data = {'method': 'snowball', 'trials': 500, 'rate_volatility': '5.00', 'seed': 7}
+        first = self.client.post('/api/plans/plans/stress/', data, format='json').data
+        second = self.client.post('/api/plans/plans/stress/', data, format='json').data
+
+        self.assertEqual(first, second)
+        bands = first['total_interest']
+        self.assertLessEqual(bands['p10'], bands['p50'])
+        self.assertLessEqual(bands['p50'], bands['p90'])
+        self.assertLess(bands['p10'], bands['p90'])
+
+    def test_rejects_too_many_trials(self):
+        """Test the number of trials is bounded."""
+        data = {'method': 'snowball', 'trials': 1000000}
+        response = self.client.post('/api/plans/plans/stress/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConsolidationScanAPITest(PlanTestMixin, APITestCase):
+    """Test cases for the consolidation offer scanner endpoint."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.create_loans()
+
+    def test_grid_matches_single_plans(self):
+        """Test every cell agrees with a single consolidation plan at that rate and term."""
+        data = {'rates': ['0', '7.50', '18.00'], 'terms': [24, 60], 'extra_payment': '150.00'}
+        response = self.client.post('/api/plans/plans/consolidation-scan/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        for row, rate in enumerate(data['rates']):
+            for column, term in enumerate(data['terms']):
+                plan = DebtPlan(
+                    user=self.user,
+                    method='consolidation',
+                    extra_payment=Decimal('150.00'),
+                    consolidation_rate=Decimal(rate),
+                    consolidation_term=term
+                )
+                plan_data = plan.calculate_plan()
+                summary = plan_data['summary']
+                self.assertEqual(response.data['payoff_months'][row][column], plan_data['payoff_months'])
+                self.assertAlmostEqual(
+                    response.data['monthly_payment'][row][column], plan_data['monthly_payment'], delta=0.01
+                )
+                self.assertAlmostEqual(
+                    response.data['total_interest'][row][column], plan_data['total_interest'], delta=0.01
+                )
+                self.assertAlmostEqual(
+                    response.data['interest_saved'][row][column], summary['interest_saved'], delta=0.01
+                )
+
+    def test_no_outstanding_debt_rejected(self):
+        """Test a user without active loans gets a 400 rather than an unscorable grid."""
+        Loan.objects.filter(user=self.user).update(is_active=False)
+        data = {'rates': ['5.00'], 'terms': [36]}
+        response = self.client.post('/api/plans/plans/consolidation-scan/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('error', response.data)
+
+    def test_rate_range(self):
+        """Test a rate range expands into the grid rows."""
+        data = {'rate_start': '5.00', 'rate_stop': '10.00', 'rate_step': '2.50', 'terms': [36, 48, 60]}
+        response = self.client.post('/api/plans/plans/consolidation-scan/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(response.data['rates'], [5.0, 7.5, 10.0])
+        self.assertEqual(len(response.data['interest_saved']), 3)
+        self.assertEqual(len(response.data['interest_saved'][0]), 3)
+
+    def test_requires_rates(self):
+        """Test a scan needs rates or a complete rate range."""
+        data = {'rate_start': '5.00', 'terms': [36]}
+        response = self.client.post('/api/plans/plans/consolidation-scan/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class MethodComparisonTest(PlanTestMixin, TestCase):
+    """Test cases for comparing every method from one loan fetch."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.create_loans()
+
+    def test_compare_methods_fetches_loans_once(self):
+        """Test all three methods are calculated from a single query."""
+        from .views import method_comparison_data
+
+        with self.assertNumQueries(1):
+            comparison_data = method_comparison_data(
+                self.user,
+                extra_payment=Decimal('100.00'),
+                consolidation_rate=Decimal('8.00'),
+                consolidation_term=48
+            )
+
+        self.assertEqual(
+            [row['method'] for row in comparison_data],
+            ['Debt Snowball', 'Debt Avalanche', 'Debt Consolidation']
+        )
+
+    def test_compare_methods_includes_interest_free_consolidation(self):
+        """Test a 0% consolidation offer is compared rather than dropped."""
+        results = DebtPlan.compare_methods(
+            self.user, consolidation_rate=Decimal('0.00'), consolidation_term=48
+        )
+        self.assertEqual([plan.method for plan, _ in results], ['snowball', 'avalanche', 'consolidation'])
+        self.assertEqual(results[-1][1]['total_interest'], 0)
+
+    def test_compare_methods_matches_single_plans(self):
+        """Test each comparison row agrees with calculating that plan alone."""
+        results = DebtPlan.compare_methods(self.user, extra_payment=Decimal('100.00'))
+        self.assertEqual([plan.method for plan, _ in results], ['snowball', 'avalanche'])
+
+        for plan, plan_data in results:
+            expected = plan.calculate_plan()
+            self.assertEqual(plan_data['payoff_months'], expected['payoff_months'])
+            self.assertAlmostEqual(plan_data['total_interest'], expected['total_interest'], delta=0.01)
+
+
+class MethodComparisonAPITest(PlanTestMixin, APITestCase):
+    """Test cases for comparing every method through the compare endpoint."""
+
+    url = '/api/plans/plans/compare/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.create_loans()
+        subscription_plan = SubscriptionPlan.objects.create(
+            name='Test Pro Plan', plan_type='pro', price=Decimal('9.99'), max_loans=50, can_compare=True
+        )
+        UserSubscription.objects.create(user=self.user, plan=subscription_plan)
+        self.client.force_authenticate(user=self.user)
+
+    def test_methods_without_consolidation_rate(self):
+        """Test only snowball and avalanche are compared when no consolidation offer is given."""
+        response = self.client.post(self.url, {'mode': 'methods', 'extra_payment': '100.00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        rows = response.data['comparison_data']
+        self.assertEqual([row['method'] for row in rows], ['Debt Snowball', 'Debt Avalanche'])
+        for row, plan in zip(rows, DebtPlan.compare_methods(self.user, extra_payment=Decimal('100.00'))):
+            self.assertEqual(row['payoff_months'], plan[1]['payoff_months'])
+        self.assertIn(response.data['fastest_payoff'], rows)
+
+    def test_methods_with_consolidation_rate(self):
+        """Test a consolidation offer adds a consolidation row matching a single plan."""
+        data = {'mode': 'methods', 'consolidation_rate': '0.00', 'consolidation_term': 48}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        rows = response.data['comparison_data']
+        self.assertEqual(
+            [row['method'] for row in rows], ['Debt Snowball', 'Debt Avalanche', 'Debt Consolidation']
+        )
+        plan = DebtPlan(
+            user=self.user, method='consolidation', consolidation_rate=Decimal('0.00'), consolidation_term=48
+        )
+        self.assertEqual(rows[-1]['payoff_months'], plan.calculate_plan()['payoff_months'])
+        self.assertEqual(rows[-1]['total_interest_saved'], 0)
+
+    def test_methods_requires_compare_subscription(self):
+        """Test users without a plan that allows comparison are refused."""
+        UserSubscription.objects.filter(user=self.user).delete()
+        response = self.client.post(self.url, {'mode': 'methods'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_methods_web_form(self):
+        """Test the web compare view renders a method comparison posted from the plan list."""
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get('/plans/list/'), 'name="mode" value="methods"')
+
+        data = {'mode': 'methods', 'extra_payment': '100.00', 'consolidation_rate': '', 'consolidation_term': ''}
+        response = self.client.post('/plans/compare/', data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row['method'] for row in response.context['comparison_data']], ['Debt Snowball', 'Debt Avalanche']
+        )
+
+
+class CalculationJobTest(PlanTestMixin, APITestCase):
+    """Test cases for queued plan calculations."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.create_loans()
+        self.plan = DebtPlan.objects.create(
+            user=self.user, name='Test Plan', method='avalanche', extra_payment=Decimal('100.00')
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_async_calculate_queues_job(self):
+        """Test an async calculate answers 202 with the queued job instead of calculating."""
+        # Paused plans do not count towards the free tier plan limit
+        DebtPlan.objects.filter(pk=self.plan.pk).update(status='paused')
+
+        response = self.client.post(
+            f'/api/plans/plans/{self.plan.id}/calculate/', {'async': True, 'engine': 'numpy'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = PlanCalculationJob.objects.get(pk=response.data['id'])
+        self.assertEqual(job.plan, self.plan)
+        self.assertEqual(job.engine, 'numpy')
+        self.assertEqual(response.data['status'], 'queued')
+        self.plan.refresh_from_db()
+        self.assertFalse(self.plan.plan_data)
+
+    def test_claim_is_exclusive(self):
+        """Test a job can only be claimed by one worker."""
+        job = PlanCalculationJob.objects.create(plan=self.plan)
+
+        self.assertEqual(PlanCalculationJob.claim_next(), job)
+        self.assertIsNone(PlanCalculationJob.claim_next())
+
+    def test_stale_running_job_is_reclaimed(self):
+        """Test a job whose worker died mid-run is claimed again, then failed after too many tries."""
+        job = PlanCalculationJob.objects.create(plan=self.plan)
+        self.assertEqual(PlanCalculationJob.claim_next(), job)
+
+        # The worker is still within the timeout, so nobody else takes the job
+        self.assertIsNone(PlanCalculationJob.claim_next())
+
+        PlanCalculationJob.objects.filter(pk=job.pk).update(
+            started_at=timezone.now() - PlanCalculationJob.STALE_AFTER - timedelta(seconds=1)
+        )
+        reclaimed = PlanCalculationJob.claim_next()
+        self.assertEqual(reclaimed, job)
+        self.assertEqual(reclaimed.attempts, 2)
+
+        PlanCalculationJob.objects.filter(pk=job.pk).update(
+            attempts=PlanCalculationJob.MAX_ATTEMPTS,
+            started_at=timezone.now() - PlanCalculationJob.STALE_AFTER - timedelta(seconds=1)
+        )
+        self.assertIsNone(PlanCalculationJob.claim_next())
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIsNotNone(job.finished_at)
+
+    def test_worker_runs_queued_jobs(self):
+        """Test the worker command calculates the plan and records timings."""
+        job = PlanCalculationJob.objects.create(plan=self.plan, engine='numpy')
+
+        call_command('run_plan_worker', '--once', stdout=StringIO())
+
+        job.refresh_from_db()
+        self.plan.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertIsNotNone(job.run_seconds)
+        self.assertEqual(self.plan.status, 'active')
+        self.assertEqual(self.plan.schedule_months, self.plan.plan_data['payoff_months'])
+
+    def test_failed_job_records_error(self):
+        """Test a calculation error marks the job failed instead of crashing the worker."""
+        job = PlanCalculationJob.objects.create(plan=self.plan)
+
+        with mock.patch.object(DebtPlan, 'run_calculation', side_effect=ValueError('boom')):
+            call_command('run_plan_worker', '--once', stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.error, 'boom')
+
+    def test_job_status_endpoint(self):
+        """Test the status endpoint reports a queued job and its outcome."""
+        job = PlanCalculationJob.objects.create(plan=self.plan)
+        url = f'/api/plans/plans/{self.plan.id}/jobs/{job.id}/'
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'queued')
+        self.assertIsNone(response.data['run_seconds'])
+
+        call_command('run_plan_worker', '--once', stdout=StringIO())
+        response = self.client.get(url)
+        self.assertEqual(response.data['status'], 'done')
+        self.assertIsNotNone(response.data['queued_seconds'])
+
+    def test_job_status_endpoint_unknown_job(self):
+        """Test a job id that is not a valid UUID is a 404, not a server error."""
+        response = self.client.get(f'/api/plans/plans/{self.plan.id}/jobs/not-a-uuid/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CalculationTimingTest(PlanTestMixin, APITestCase):
+    """Test cases for per-phase timing of the calculate action."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.create_loans()
+        # Paused plans do not count towards the free tier plan limit
+        self.plan = DebtPlan.objects.create(user=self.user, name='Test Plan', method='snowball', status='paused')
+        self.url = f'/api/plans/plans/{self.plan.id}/calculate/'
+        self.client.force_authenticate(user=self.user)
+
+    @override_settings(PLAN_TIMING=True)
+    def test_phases_reported_when_enabled(self):
+        """Test each phase is logged and returned in the Server-Timing header."""
+        with self.assertLogs('plans.views', level='INFO') as logs:
+            response = self.client.post(self.url, {'engine': 'numpy'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        header = response['Server-Timing']
+        for phase in ('loans', 'simulate', 'encode', 'save', 'serialize'):
+            self.assertIn(f'{phase};dur=', header)
+        self.assertIn('loan_count;desc=5', header)
+
+        record = logs.records[0]
+        self.assertEqual(record.loan_count, 5)
+        self.assertEqual(record.months, response.data['payoff_months'])
+        self.assertGreater(record.plan_data_bytes, 0)
+        self.assertGreaterEqual(record.simulate_ms, 0)
+
+    @override_settings(PLAN_TIMING=True)
+    def test_unchanged_plan_reports_no_simulated_months(self):
+        """Test a plan returned unchanged from a resumed calculation reports zero months simulated."""
+        self.client.post(self.url, {'engine': 'numpy'}, format='json')
+        # An earlier resume leaves its month in the stored summary
+        self.plan.refresh_from_db()
+        self.plan.plan_data['summary']['resumed_from_month'] = 2
+        self.plan.status = 'paused'
+        self.plan.save()
+
+        with self.assertLogs('plans.views', level='INFO') as logs:
+            response = self.client.post(self.url, {'engine': 'numpy'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(logs.records[0].months, 0)
+        self.assertIn('months;desc=0', response['Server-Timing'])
+
+    def test_no_timing_when_disabled(self):
+        """Test nothing is recorded with timing switched off."""
+        response = self.client.post(self.url, {'engine': 'numpy'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Server-Timing', response)
+
+
+class RecalculatePlansCommandTest(PlanTestMixin, TestCase):
+    """Test cases for the bulk plan recalculation command."""
+
+    def setUp(self):
+        self.plans = []
+        for number, method in enumerate(('snowball', 'avalanche', 'consolidation')):
+            user = User.objects.create_user(username=f'user{number}', password='testpass123')
+            self.create_loans(user=user)
+            self.plans.append(DebtPlan.objects.create(
+                user=user, name='Plan', method=method, extra_payment=Decimal('100.00'),
+                consolidation_rate=Decimal('8.00'), consolidation_term=60, status='active'
+            ))
+        self.draft = DebtPlan.objects.create(user=user, name='Draft', method='snowball', status='draft')
+        self.plans.sort(key=lambda plan: plan.pk)
+
+    def test_recalculates_active_plans(self):
+        """Test every active plan is recalculated in chunks and drafts are left alone."""
+        output = StringIO()
+        call_command('recalculate_plans', '--workers', '0', '--chunk-size', '2', stdout=output)
+
+        self.assertIn(f'last id {self.plans[-1].pk}', output.getvalue())
+        for plan in self.plans:
+            plan.refresh_from_db()
+            expected = plan.calculate_plan()
+            self.assertEqual(plan.payoff_months, expected['payoff_months'])
+            self.assertTrue(is_columnar(plan.plan_data['schedule']))
+            self.assertIn('inputs', plan.plan_data)
+        self.draft.refresh_from_db()
+        self.assertEqual(self.draft.plan_data, {})
+
+    def test_recalculates_in_worker_processes(self):
+        """Test chunks calculated in a pool of worker processes are written back."""
+        output = StringIO()
+        call_command('recalculate_plans', '--workers', '2', '--chunk-size', '1', stdout=output)
+
+        self.assertIn('Recalculated 3 plan(s).', output.getvalue())
+        for plan in self.plans:
+            plan.refresh_from_db()
+            expected = plan.calculate_plan()
+            self.assertEqual(plan.payoff_months, expected['payoff_months'])
+            self.assertAlmostEqual(float(plan.total_debt), expected['total_debt'], places=2)
+            self.assertIn('inputs', plan.plan_data)
+
+    def test_resumes_after_plan_id(self):
+        """Test plans up to the resume point are skipped."""
+        call_command(
+            'recalculate_plans', '--workers', '0', '--after', str(self.plans[0].pk), stdout=StringIO()
+        )
+
+        plan_data = [DebtPlan.objects.get(pk=plan.pk).plan_data for plan in self.plans]
+        self.assertEqual(plan_data[0], {})
+        self.assertTrue(all(plan_data[1:]))
+
+
+class BenchmarkCommandTest(TestCase):
+    """Test cases for the plan benchmark command."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.baseline = Path(directory.name) / 'baseline.json'
+        self.options = ['--baseline', str(self.baseline), '--sizes', '1', '5', '--engines', 'numpy', '--repeat', '1']
+
+    def test_synthetic_portfolios_are_reproducible(self):
+        """Test portfolios depend only on size, profile and seed, with capped plans hitting 600 months."""
+        first = synthetic_portfolio(20, 'capped')
+        second = synthetic_portfolio(20, 'capped')
+        self.assertEqual(
+            [(loan.id, loan.balance, loan.interest_rate) for loan in first],
+            [(loan.id, loan.balance, loan.interest_rate) for loan in second]
+        )
+        for method in ('snowball', 'avalanche'):
+            plan_data = DebtPlan(method=method).calculate_plan(engine='event', loans=first)
+            self.assertEqual(plan_data['payoff_months'], 600)
+            self.assertEqual(plan_data['summary']['remaining_loans'], 20)
+
+    def test_save_and_compare_baseline(self):
+        """Test a saved baseline is compared against and regressions are flagged."""
+        call_command('benchmark_plans', '--save', *self.options, stdout=StringIO())
+        results = json.loads(self.baseline.read_text())
+        self.assertEqual(len(results), 3 * 3 * 2)
+        for result in results:
+            self.assertGreater(result['peak_memory'], 0)
+            self.assertGreater(result['json_bytes'], 0)
+
+        # Pretend the baseline was far faster and smaller
+        for result in results:
+            result['seconds'] /= 100
+            result['json_bytes'] = 1
+        self.baseline.write_text(json.dumps(results))
+
+        output = StringIO()
+        call_command('benchmark_plans', *self.options, stdout=output)
+        self.assertIn('REGRESSION', output.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('benchmark_plans', '--fail-on-regression', *self.options, stdout=StringIO())
+
+
+class GoldenOutputTest(TestCase):
+    """Test cases for the golden-output equivalence harness."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.fixture = Path(directory.name) / 'golden.json'
+
+    def test_engines_match_recorded_outputs(self):
+        """Test the alternative engines reproduce the recorded reference outputs."""
+        call_command(
+            'check_golden_plans', '--record', '--count', '6', '--fixture', str(self.fixture), stdout=StringIO()
+        )
+        cases = json.loads(self.fixture.read_text())
+        self.assertEqual(len(cases), len(EDGE_CASES) + 6)
+
+        output = StringIO()
+        call_command('check_golden_plans', '--fixture', str(self.fixture), stdout=output)
+        self.assertIn('Every engine matches', output.getvalue())
+
+    def test_reports_first_divergence(self):
+        """Test a changed amount is reported at its month and loan."""
+        case = golden_cases(count=0)[0]
+        expected = calculate_case(case)
+        actual = calculate_case(case)
+        loan_id = case['loans'][0][0]
+        actual['schedule'][4]['payments'][loan_id]['interest'] += 0.05
+        actual['schedule'][9]['payments'][loan_id]['interest'] += 0.05
+
+        self.assertIsNone(first_divergence(expected, calculate_case(case)))
+        self.assertEqual(
+            first_divergence(expected, actual),
+            f"month 5 loan {loan_id} interest: expected {expected['schedule'][4]['payments'][loan_id]['interest']}, "
+            f"got {actual['schedule'][4]['payments'][loan_id]['interest']}"
+        )
+        self.assertIsNone(first_divergence(expected, actual, tolerance=0.10))
@@ -0,0 +1,62 @@
+"""Per-phase timing of plan calculations.
+
+A ``PhaseTimer`` records how long each named phase of a calculation took,
+along with counts such as loans processed and months simulated. The results
+are reported as structured log fields and as a ``Server-Timing`` header.
+When timing is switched off ``NULL_TIMER`` is passed instead, and its
+methods do nothing.
+"""
+
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class PhaseTimer:
+    """Collect phase durations and counts for one calculation."""
+
+    enabled = True
+
+    def __init__(self):
+        self.phases = {}
+        self.counts = {}
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block, adding to any earlier time under ``name``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter() - started
+
+    def count(self, name, value):
+        """Record a count such as the number of loans or months."""
+        self.counts[name] = value
+
+    def log_fields(self):
+        """Return the timings in milliseconds and the counts as flat log fields."""
+        fields = {f'{name}_ms': round(seconds * 1000, 3) for name, seconds in self.phases.items()}
+        fields.update(self.counts)
+        return fields
+
+    def server_timing(self):
+        """Format the timings and counts as a ``Server-Timing`` header value."""
+        metrics = [f'{name};dur={seconds * 1000:.3f}' for name, seconds in self.phases.items()]
+        metrics.extend(f'{name};desc={value}' for name, value in self.counts.items())
+        return ', '.join(metrics)
+
+
+class NullTimer:
+    """Stand-in for ``PhaseTimer`` that records nothing."""
+
+    enabled = False
+    _no_phase = nullcontext()
+
+    def phase(self, name):
+        return self._no_phase
+
+    def count(self, name, value):
+        pass
+
+
+NULL_TIMER = NullTimer()
@@ -15,33 +15,24 @@ plans_router.register(r'progress', PlanProgressViewSet, basename='plan-progress'
 
 def plan_compare_view(request):
     """Web view for comparing debt plans."""
+    # Import here to avoid circular imports
+    from .models import DebtPlan
+    from .serializers import MethodComparisonSerializer
+    from .views import comparison_summary, method_comparison_data, plan_comparison_entry
+
     if request.method == 'POST':
+        if request.POST.get('mode') == 'methods' and request.user.is_authenticated:
+            serializer = MethodComparisonSerializer(data=request.POST)
+            if serializer.is_valid():
+                comparison_data = method_comparison_data(request.user, **serializer.validated_data)
+                return render(request, 'plans/plan_compare.html', comparison_summary(comparison_data))
+
         plan_ids = request.POST.getlist('plan_ids')
         if len(plan_ids) >= 2:
-            # Import here to avoid circular imports
-            from .models import DebtPlan
             plans = DebtPlan.objects.filter(id__in=plan_ids, user=request.user)
             if plans.count() == len(plan_ids):
-                comparison_data = []
-                for plan in plans:
-                    comparison_data.append({
-                        'id': plan.id,
-                        'name': plan.name,
-                        'method': plan.get_method_display(),
-                        'total_debt': plan.total_debt,
-                        'total_interest_saved': plan.total_interest_saved,
-                        'payoff_months': plan.payoff_months,
-                        'monthly_payment': plan.total_payments / plan.payoff_months if plan.payoff_months else 0,
-                        'total_payments': plan.total_payments
-                    })
-
-                context = {
-                    'comparison_data': comparison_data,
-                    'best_interest_savings': max(comparison_data, key=lambda x: x['total_interest_saved']),
-                    'fastest_payoff': min(comparison_data, key=lambda x: x['payoff_months']),
-                    'lowest_payment': min(comparison_data, key=lambda x: x['monthly_payment'])
-                }
-                return render(request, 'plans/plan_compare.html', context)
+                comparison_data = [plan_comparison_entry(plan) for plan in plans]
+                return render(request, 'plans/plan_compare.html', comparison_summary(comparison_data))
 
     # If GET or invalid POST, redirect to plans list
     from django.shortcuts import redirect
@@ -1,4 +1,4 @@
-from rest_framework import viewsets, status, serializers
+from rest_framework import generics, viewsets, status, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
@@ -7,12 +7,18 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db import models
 from django.db.models import Count, Sum
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.conf import settings
 from billing.permissions import HasPlanLimit, CanExportPlans, CanComparePlans
-from .models import DebtPlan, PlanProgress
+from .models import DebtPlan, PlanCalculationJob, PlanProgress
+from .engines import ENGINE_CHOICES, DEFAULT_ENGINE
+from .cache import plan_cache
+from .schedules import decode_plan_data, iter_schedule_json, month_range
+from .timing import NULL_TIMER, PhaseTimer
 from .serializers import (
-    DebtPlanSerializer, DebtPlanCalculateSerializer,
-    PlanProgressSerializer, DebtPlanSummarySerializer
+    DebtPlanSerializer, DebtPlanCalculateSerializer, ExtraPaymentSweepSerializer, ConsolidationScanSerializer,
+    MethodComparisonSerializer, PlanCalculationJobSerializer, PlanProgressSerializer,
+    DebtPlanSummarySerializer, ScheduleQuerySerializer, StressTestSerializer, TargetSolveSerializer
 )
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
@@ -22,10 +28,65 @@ from reportlab.lib import colors
 from django.http import HttpResponse
 from io import BytesIO
 import json
+import logging
 
 # Import Loan model for plan creation view
 from loans.models import Loan
 
+logger = logging.getLogger(__name__)
+
+
+def plan_comparison_entry(plan):
+    """Build a comparison row for a saved, calculated plan."""
+    return {
+        'id': plan.id,
+        'name': plan.name,
+        'method': plan.get_method_display(),
+        'total_debt': plan.total_debt,
+        'total_interest_saved': plan.total_interest_saved,
+        'payoff_months': plan.payoff_months,
+        'monthly_payment': plan.total_payments / plan.payoff_months if plan.payoff_months else 0,
+        'total_payments': plan.total_payments
+    }
+
+
+def method_comparison_data(user, extra_payment=0, consolidation_rate=None, consolidation_term=None):
+    """Build comparison rows for every method from one fetch of the user's loans.
+
+    Values are derived the same way the calculate action stores them, so the
+    rows line up with those of saved plans.
+    """
+    comparison_data = []
+    for plan, plan_data in DebtPlan.compare_methods(
+        user,
+        extra_payment=extra_payment,
+        consolidation_rate=consolidation_rate,
+        consolidation_term=consolidation_term,
+        parallel=True
+    ):
+        total_payments = plan_data.get('monthly_payment', 0) * plan_data['payoff_months']
+        comparison_data.append({
+            'id': None,
+            'name': plan.name,
+            'method': plan.get_method_display(),
+            'total_debt': plan_data['total_debt'],
+            'total_interest_saved': plan_data.get('total_interest', 0),
+            'payoff_months': plan_data['payoff_months'],
+            'monthly_payment': plan_data.get('monthly_payment', 0),
+            'total_payments': total_payments
+        })
+    return comparison_data
+
+
+def comparison_summary(comparison_data):
+    """Pick the standout plans out of a list of comparison rows."""
+    return {
+        'comparison_data': comparison_data,
+        'best_interest_savings': max(comparison_data, key=lambda x: x['total_interest_saved']),
+        'fastest_payoff': min(comparison_data, key=lambda x: x['payoff_months']),
+        'lowest_payment': min(comparison_data, key=lambda x: x['monthly_payment'])
+    }
+
 
 class DebtPlanViewSet(viewsets.ModelViewSet):
     """ViewSet for managing debt plans."""
@@ -52,20 +113,188 @@ class DebtPlanViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        # Calculate the plan
-        plan_data = plan.calculate_plan()
+        engine = request.data.get('engine', DEFAULT_ENGINE)
+        if engine not in dict(ENGINE_CHOICES):
+            return Response(
+                {'error': f'Unknown calculation engine: {engine}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # Update plan with calculated data
-        plan.total_debt = plan_data['total_debt']
-        plan.total_interest_saved = plan_data.get('total_interest', 0)
-        plan.payoff_months = plan_data['payoff_months']
-        plan.total_payments = plan_data.get('monthly_payment', 0) * plan_data['payoff_months']
-        plan.plan_data = plan_data
-        plan.status = 'active'
-        plan.save()
+        run_async = request.data.get('async', settings.PLAN_CALCULATION_ASYNC)
+        if run_async in (True, 'true', '1', 1):
+            job = PlanCalculationJob.objects.create(plan=plan, engine=engine)
+            return Response(
+                PlanCalculationJobSerializer(job).data,
+                status=status.HTTP_202_ACCEPTED
+            )
 
-        serializer = self.get_serializer(plan)
-        return Response(serializer.data)
+        timer = PhaseTimer() if settings.PLAN_TIMING else NULL_TIMER
+        plan.run_calculation(engine=engine, timer=timer)
+
+        with timer.phase('serialize'):
+            serializer = self.get_serializer(plan)
+            response = Response(serializer.data)
+
+        if timer.enabled:
+            logger.info(
+                'Calculated plan %s', plan.id,
+                extra={'plan': str(plan.id), 'engine': engine, **timer.log_fields()}
+            )
+            response['Server-Timing'] = timer.server_timing()
+        return response
+
+    @action(detail=True, methods=['get'], url_path=r'jobs/(?P<job_id>[^/.]+)', permission_classes=[IsAuthenticated])
+    def job(self, request, pk=None, job_id=None):
+        """Report the status and timing of a queued calculation."""
+        plan = self.get_object()
+        # DRF's helper answers 404 for ids that are not valid UUIDs too
+        job = generics.get_object_or_404(PlanCalculationJob, pk=job_id, plan=plan)
+        return Response(PlanCalculationJobSerializer(job).data)
+
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
+    def schedule(self, request, pk=None):
+        """Return one page of the plan's monthly schedule.
+
+        Pages are bounded by ``from_month``/``to_month`` and ``limit``, continued
+        with ``cursor``, and can be limited to some loans with ``loan``. Only the
+        requested months and loans are decoded from the stored schedule.
+        """
+        plan = self.get_object()
+        serializer = ScheduleQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        schedule = (plan.plan_data or {}).get('schedule')
+        loan_ids = data.get('loan')
+        bounds = month_range(schedule, loan_ids)
+        if bounds is None:
+            return Response({'months': 0, 'next_cursor': None, 'next': None, 'results': []})
+
+        last_month = min(data.get('to_month', bounds[1]), bounds[1])
+        from_month = max(data.get('cursor') or data.get('from_month') or bounds[0], bounds[0])
+        to_month = min(from_month + data['limit'] - 1, last_month)
+        next_cursor = to_month + 1 if to_month < last_month else None
+
+        next_url = None
+        if next_cursor:
+            params = request.query_params.copy()
+            params['cursor'] = next_cursor
+            next_url = request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+
+        return Response({
+            'months': bounds[1] - bounds[0] + 1,
+            'from_month': from_month,
+            'to_month': to_month,
+            'next_cursor': next_cursor,
+            'next': next_url,
+            'results': plan.schedule_slice(from_month, to_month, loan_ids),
+        })
+
+    @action(detail=True, methods=['get'], url_path='schedule/stream', permission_classes=[IsAuthenticated])
+    def schedule_stream(self, request, pk=None):
+        """Stream the plan's full monthly schedule as JSON, month by month."""
+        plan = self.get_object()
+        plan_data = plan.plan_data or {}
+        header = {
+            'plan': str(plan.id),
+            'method': plan.method,
+            'months': plan.schedule_months,
+            'total_debt': plan_data.get('total_debt', 0),
+            'total_interest': plan_data.get('total_interest', 0),
+        }
+        return StreamingHttpResponse(
+            iter_schedule_json(plan_data.get('schedule'), header),
+            content_type='application/json'
+        )
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def simulate(self, request):
+        """Calculate a plan scenario against the user's loans without saving anything."""
+        serializer = DebtPlanCalculateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        plan = DebtPlan(
+            user=request.user,
+            method=data['method'],
+            extra_payment=data['extra_payment'],
+            consolidation_rate=data.get('consolidation_rate'),
+            consolidation_term=data.get('consolidation_term')
+        )
+        plan_data = plan_cache.calculate(
+            plan, engine=data['engine'], include_schedule=data['mode'] == 'full'
+        )
+
+        return Response(decode_plan_data(plan_data))
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def sweep(self, request):
+        """Calculate payoff months and interest across a range of extra payments."""
+        serializer = ExtraPaymentSweepSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        # The no-extra baseline rides along in the same vectorized run
+        plan = DebtPlan(user=request.user, method=data['method'])
+        baseline, *results = plan.sweep_extra_payments([0] + data['extra_payments'])
+
+        for result in results:
+            result['months_saved'] = baseline['payoff_months'] - result['payoff_months']
+            result['interest_saved'] = round(baseline['total_interest'] - result['total_interest'], 2)
+
+        return Response({
+            'method': data['method'],
+            'baseline': baseline,
+            'results': results
+        })
+
+    @action(detail=False, methods=['post'], url_path='consolidation-scan', permission_classes=[IsAuthenticated])
+    def consolidation_scan(self, request):
+        """Score consolidation offers across a grid of rates and terms."""
+        serializer = ConsolidationScanSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        loans = list(Loan.objects.filter(user=request.user, is_active=True))
+        if sum(loan.balance for loan in loans) <= 0:
+            return Response(
+                {'error': 'You have no outstanding debt to consolidate.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(DebtPlan.scan_consolidation_offers(
+            request.user, data['rates'], data['terms'], extra_payment=data['extra_payment'], loans=loans
+        ))
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def solve(self, request):
+        """Find the smallest extra payment that meets a payoff month or interest budget."""
+        serializer = TargetSolveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        plan = DebtPlan(user=request.user, method=data['method'])
+        result = plan.required_extra_payment(
+            target_months=data.get('target_months'), max_interest=data.get('max_interest')
+        )
+        return Response({
+            'method': data['method'],
+            'target_months': data.get('target_months'),
+            'max_interest': data.get('max_interest'),
+            'feasible': result['extra_payment'] is not None,
+            **result
+        })
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def stress(self, request):
+        """Calculate payoff month and interest bands under random variable-rate paths."""
+        serializer = StressTestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        plan = DebtPlan(user=request.user, method=data['method'], extra_payment=data['extra_payment'])
+        result = plan.stress_test(data['trials'], data['rate_volatility'], seed=data.get('seed'))
+        return Response({'method': data['method'], **result})
 
     @action(detail=True, methods=['post'])
     def activate(self, request, pk=None):
@@ -199,7 +428,7 @@ class DebtPlanViewSet(viewsets.ModelViewSet):
             story.append(Spacer(1, 12))
 
             schedule_data = [['Month', 'Payment', 'Principal', 'Interest', 'Balance']]
-            for month_data in plan.plan_data['schedule'][:24]:
+            for month_data in plan.schedule_preview:
                 schedule_data.append([
                     str(month_data['month']),
                     f"${month_data['total_payment']:,.0f}",
@@ -244,7 +473,17 @@ class DebtPlanViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, CanComparePlans])
     def compare(self, request):
-        """Compare multiple debt plans (premium feature)."""
+        """Compare multiple debt plans (premium feature).
+
+        With ``mode=methods`` every method is calculated for the user's
+        current loans instead, without needing saved plans.
+        """
+        if request.data.get('mode') == 'methods':
+            serializer = MethodComparisonSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            comparison_data = method_comparison_data(request.user, **serializer.validated_data)
+            return Response(comparison_summary(comparison_data))
+
         plan_ids = request.data.get('plan_ids', [])
 
         if not plan_ids or len(plan_ids) < 2:
@@ -270,25 +509,8 @@ class DebtPlanViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        comparison_data = []
-        for plan in plans:
-            comparison_data.append({
-                'id': plan.id,
-                'name': plan.name,
-                'method': plan.get_method_display(),
-                'total_debt': plan.total_debt,
-                'total_interest_saved': plan.total_interest_saved,
-                'payoff_months': plan.payoff_months,
-                'monthly_payment': plan.total_payments / plan.payoff_months if plan.payoff_months else 0,
-                'total_payments': plan.total_payments
-            })
-
-        return Response({
-            'comparison_data': comparison_data,
-            'best_interest_savings': max(comparison_data, key=lambda x: x['total_interest_saved']),
-            'fastest_payoff': min(comparison_data, key=lambda x: x['payoff_months']),
-            'lowest_payment': min(comparison_data, key=lambda x: x['monthly_payment'])
-        })
+        comparison_data = [plan_comparison_entry(plan) for plan in plans]
+        return Response(comparison_summary(comparison_data))
 
     @action(detail=False, methods=['get'])
     def summary(self, request):